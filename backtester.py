@@ -4,25 +4,29 @@
 
 Запуск:
     python backtester.py --symbol BTCUSDT --days 7 --balance 100
+    python backtester.py --symbols BTCUSDT,ETHUSDT,SOLUSDT --from-csv
 """
 
 import argparse
+import hashlib
 import logging
 import math
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from itertools import product
+from typing import Dict, Iterable, List, Optional, Tuple
 
 import pandas as pd
 import numpy as np
+from numba import njit
 
 from bybit_client import BybitClient
 from indicators import (
     calculate_rsi,
     calculate_ema,
     calculate_macd,
-    calculate_bollinger_bands,
     calculate_atr,
 )
 from config import config
@@ -33,15 +37,43 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Кэш индикаторов для повторных прогонов по одним и тем же данным
+INDICATOR_CACHE_DIR = os.path.join("data", ".cache")
+INDICATOR_COLUMNS = ["rsi", "ema20", "ema50", "macd_hist", "atr"]
+INDICATOR_CACHE_VERSION = 1  # Увеличить при изменении формул индикаторов
+
+# Сделки хранятся структурированным массивом (по записи на сделку), а не списком словарей
+TRADE_BUY = 0
+TRADE_SELL = 1
+
+# Причины сделок — индексы в TRADE_REASONS
+REASON_SIGNAL = 0
+REASON_STOP_LOSS = 1
+REASON_TAKE_PROFIT = 2
+REASON_RSI_OVERBOUGHT = 3
+REASON_END_OF_DATA = 4
+TRADE_REASONS = ("signal", "stop_loss", "take_profit", "rsi_overbought", "end_of_data")
+
+TRADE_DTYPE = np.dtype([
+    ("idx", np.int64),
+    ("action", np.uint8),  # TRADE_BUY / TRADE_SELL
+    ("reason", np.uint8),  # REASON_*
+    ("price", np.float64),
+    ("pnl", np.float64),
+    ("timestamp", "datetime64[ns]"),
+])
+
 
 class BacktestResult:
     """Результаты бэктеста."""
 
     def __init__(self):
-        self.trades: List[Dict] = []
-        self.equity_curve: List[float] = []
+        self.trades: np.ndarray = np.empty(0, dtype=TRADE_DTYPE)
+        self.equity_curve: np.ndarray = np.empty(0, dtype=np.float32)
         self.initial_balance: float = 0
         self.final_balance: float = 0
+        self._stats: Dict = {}
+        self._stats_trades: Optional[np.ndarray] = None
 
     @property
     def total_return_pct(self) -> float:
@@ -49,17 +81,39 @@ class BacktestResult:
             return 0
         return (self.final_balance - self.initial_balance) / self.initial_balance * 100
 
+    def _trade_stats(self) -> Dict:
+        """
+        Статистика по сделкам за один проход по pnl.
+
+        Пересчитывается только когда trades заменён другим массивом.
+        """
+        if self._stats_trades is not self.trades:
+            pnl = self.trades["pnl"]
+            wins = pnl > 0
+            losses = pnl < 0
+            n_wins = int(wins.sum())
+            n_losses = int(losses.sum())
+            self._stats = {
+                "total": len(self.trades),
+                "wins": n_wins,
+                "losses": n_losses,
+                "avg_profit": float(pnl[wins].mean()) if n_wins else 0,
+                "avg_loss": float(pnl[losses].mean()) if n_losses else 0,
+            }
+            self._stats_trades = self.trades
+        return self._stats
+
     @property
     def total_trades(self) -> int:
-        return len([t for t in self.trades if t["action"] != "hold"])
+        return self._trade_stats()["total"]
 
     @property
     def winning_trades(self) -> int:
-        return len([t for t in self.trades if t.get("pnl", 0) > 0])
+        return self._trade_stats()["wins"]
 
     @property
     def losing_trades(self) -> int:
-        return len([t for t in self.trades if t.get("pnl", 0) < 0])
+        return self._trade_stats()["losses"]
 
     @property
     def win_rate(self) -> float:
@@ -68,48 +122,73 @@ class BacktestResult:
             return 0
         return self.winning_trades / closed * 100
 
+    def _trade_equity(self) -> np.ndarray:
+        """
+        Капитал после каждой закрытой сделки: initial_balance + накопленный P&L.
+
+        Используется вместо equity_curve, если бэктест шёл с record_equity=False.
+        """
+        sells = self.trades[self.trades["action"] == TRADE_SELL]
+        if len(sells) == 0:
+            return np.empty(0, dtype=np.float64)
+        return self.initial_balance + np.concatenate(([0.0], np.cumsum(sells["pnl"])))
+
     @property
     def max_drawdown_pct(self) -> float:
-        if not self.equity_curve:
+        if len(self.equity_curve) > 0:
+            equity = np.asarray(self.equity_curve, dtype=np.float64)
+        else:
+            equity = self._trade_equity()
+        if len(equity) == 0:
             return 0
-        peak = self.equity_curve[0]
-        max_dd = 0
-        for equity in self.equity_curve:
-            if equity > peak:
-                peak = equity
-            dd = (peak - equity) / peak * 100
-            max_dd = max(max_dd, dd)
-        return max_dd
+        peaks = np.maximum.accumulate(equity)
+        drawdowns = (peaks - equity) / peaks * 100
+        return max(0, float(drawdowns.max()))
 
     @property
     def sharpe_ratio(self) -> float:
         """Annualized Sharpe Ratio (без risk-free rate)."""
-        if len(self.equity_curve) < 2:
-            return 0
-        returns = []
-        for i in range(1, len(self.equity_curve)):
-            r = (self.equity_curve[i] - self.equity_curve[i - 1]) / self.equity_curve[i - 1]
-            returns.append(r)
-        if not returns:
-            return 0
-        avg = np.mean(returns)
-        std = np.std(returns)
+        if len(self.equity_curve) >= 2:
+            equity = np.asarray(self.equity_curve, dtype=np.float64)
+            # Аннуализация: предполагаем, что каждый шаг = 15 минут
+            # ~35000 шагов в году (365 * 24 * 60 / 15)
+            periods_per_year = 365 * 24 * 4
+        else:
+            # Без кривой капитала — по закрытым сделкам, с аннуализацией
+            # по фактической частоте сделок
+            equity = self._trade_equity()
+            if len(equity) < 3:
+                return 0
+            sell_times = self.trades["timestamp"][self.trades["action"] == TRADE_SELL]
+            span_years = (sell_times[-1] - sell_times[0]) / np.timedelta64(365, "D")
+            if not span_years > 0:
+                return 0
+            periods_per_year = (len(equity) - 1) / span_years
+        returns = np.diff(equity) / equity[:-1]
+        avg = returns.mean()
+        std = returns.std()
         if std == 0:
             return 0
-        # Аннуализация: предполагаем, что каждый шаг = 15 минут
-        # ~35000 шагов в году (365 * 24 * 60 / 15)
-        periods_per_year = 365 * 24 * 4
         return (avg / std) * math.sqrt(periods_per_year)
 
     @property
     def avg_profit(self) -> float:
-        profits = [t["pnl"] for t in self.trades if t.get("pnl", 0) > 0]
-        return np.mean(profits) if profits else 0
+        return self._trade_stats()["avg_profit"]
 
     @property
     def avg_loss(self) -> float:
-        losses = [t["pnl"] for t in self.trades if t.get("pnl", 0) < 0]
-        return np.mean(losses) if losses else 0
+        return self._trade_stats()["avg_loss"]
+
+    def summary(self) -> Dict:
+        """Основные метрики одной строкой — для сводных таблиц."""
+        return {
+            "final_balance": self.final_balance,
+            "return_pct": self.total_return_pct,
+            "max_drawdown_pct": self.max_drawdown_pct,
+            "sharpe": self.sharpe_ratio,
+            "trades": self.total_trades,
+            "win_rate": self.win_rate,
+        }
 
     def print_report(self):
         print("\n" + "=" * 60)
@@ -144,11 +223,18 @@ class Backtester:
         position_size_pct: float = 5.0,
         stop_loss_pct: float = 5.0,
         take_profit_pct: float = 3.0,
+        indicator_cache_dir: Optional[str] = None,
+        record_equity: bool = True,
     ):
         self.initial_balance = initial_balance
         self.position_size_pct = position_size_pct
         self.stop_loss_pct = stop_loss_pct
         self.take_profit_pct = take_profit_pct
+        self.indicator_cache_dir = indicator_cache_dir  # None — без кэша на диске
+        # False — не хранить кривую капитала (перебор параметров);
+        # просадка и Sharpe тогда считаются по закрытым сделкам
+        self.record_equity = record_equity
+        self._fee_mult = self.FEE_PCT * 0.01  # Доля комиссии от суммы сделки
 
     def run(self, df: pd.DataFrame, symbol: str) -> BacktestResult:
         """
@@ -159,132 +245,272 @@ class Backtester:
         - SELL когда RSI > 65 ИЛИ stop-loss ИЛИ take-profit
         - Иначе HOLD
         """
-        result = BacktestResult()
-        result.initial_balance = self.initial_balance
-
         if df.empty or len(df) < 200:
             logger.error(f"Недостаточно данных: {len(df)} свечей (нужно >= 200)")
+            result = BacktestResult()
+            result.initial_balance = self.initial_balance
             result.final_balance = self.initial_balance
             return result
 
-        # Вычисляем индикаторы
-        rsi = calculate_rsi(df)
-        ema20 = calculate_ema(df, 20)
-        ema50 = calculate_ema(df, 50)
-        macd = calculate_macd(df)
-        bb = calculate_bollinger_bands(df)
-        atr = calculate_atr(df)
-
-        balance = self.initial_balance
-        position = None  # {qty, entry_price, entry_idx}
-
-        # Пропускаем первые 200 свечей (прогрев индикаторов)
-        for i in range(200, len(df)):
-            price = df["close"].iloc[i]
-            current_rsi = rsi.iloc[i]
-            current_ema20 = ema20.iloc[i]
-            current_ema50 = ema50.iloc[i]
-            current_macd_hist = macd["histogram"].iloc[i]
-            current_bb_lower = bb["lower"].iloc[i]
-            current_atr = atr.iloc[i]
-
-            if pd.isna(current_rsi) or pd.isna(current_atr):
-                result.equity_curve.append(balance)
-                continue
+        return self._simulate(self._prepare_signals(df, symbol))
 
-            # Текущая стоимость портфеля
-            equity = balance
-            if position:
-                equity += position["qty"] * price
-
-            result.equity_curve.append(equity)
-
-            if position:
-                # Проверяем stop-loss
-                loss_pct = (price - position["entry_price"]) / position["entry_price"] * 100
-                if loss_pct <= -self.stop_loss_pct:
-                    pnl = self._close_position(position, price)
-                    balance += position["qty"] * price - position["qty"] * price * self.FEE_PCT / 100
-                    result.trades.append({
-                        "action": "sell", "reason": "stop_loss",
-                        "price": price, "pnl": pnl,
-                        "idx": i, "timestamp": df["timestamp"].iloc[i],
-                    })
-                    position = None
-                    continue
+    def sweep(
+        self,
+        df: pd.DataFrame,
+        symbol: str,
+        stop_loss_pcts: Iterable[float],
+        take_profit_pcts: Iterable[float],
+        position_size_pcts: Optional[Iterable[float]] = None,
+    ) -> pd.DataFrame:
+        """
+        Перебор параметров риск-менеджмента на одних и тех же данных.
 
-                # Проверяем take-profit
-                if loss_pct >= self.take_profit_pct:
-                    pnl = self._close_position(position, price)
-                    balance += position["qty"] * price - position["qty"] * price * self.FEE_PCT / 100
-                    result.trades.append({
-                        "action": "sell", "reason": "take_profit",
-                        "price": price, "pnl": pnl,
-                        "idx": i, "timestamp": df["timestamp"].iloc[i],
-                    })
-                    position = None
-                    continue
+        Индикаторы и сигналы не зависят от SL/TP/размера позиции, поэтому
+        считаются один раз; на каждую комбинацию прогоняется только _run_core.
 
-                # Сигнал на продажу: RSI > 65
-                if current_rsi > 65:
-                    pnl = self._close_position(position, price)
-                    balance += position["qty"] * price - position["qty"] * price * self.FEE_PCT / 100
-                    result.trades.append({
-                        "action": "sell", "reason": "rsi_overbought",
-                        "price": price, "pnl": pnl,
-                        "idx": i, "timestamp": df["timestamp"].iloc[i],
-                    })
-                    position = None
+        Args:
+            df: DataFrame с OHLCV данными
+            symbol: Символ инструмента
+            stop_loss_pcts: Значения stop-loss %
+            take_profit_pcts: Значения take-profit %
+            position_size_pcts: Значения размера позиции % (по умолчанию — текущий)
 
-            else:
-                # Сигнал на покупку: RSI < 35 И EMA20 > EMA50 И MACD hist > 0
-                if (
-                    current_rsi < 35
-                    and current_ema20 > current_ema50
-                    and current_macd_hist > 0
-                ):
-                    # Размер позиции
-                    trade_amount = balance * (self.position_size_pct / 100)
-                    trade_amount = min(trade_amount, balance - 1)  # Оставляем 1 USDT
-
-                    if trade_amount < 1:
-                        continue
-
-                    fee = trade_amount * self.FEE_PCT / 100
-                    qty = (trade_amount - fee) / price
-                    balance -= trade_amount
-                    position = {
-                        "qty": qty,
-                        "entry_price": price,
-                        "entry_amount": trade_amount,
-                        "entry_idx": i,
-                    }
-                    result.trades.append({
-                        "action": "buy", "reason": "signal",
-                        "price": price, "pnl": 0,
-                        "idx": i, "timestamp": df["timestamp"].iloc[i],
-                    })
-
-        # Закрываем позицию если осталась открытой
-        if position:
-            final_price = df["close"].iloc[-1]
-            pnl = self._close_position(position, final_price)
-            balance += position["qty"] * final_price
-            result.trades.append({
-                "action": "sell", "reason": "end_of_data",
-                "price": final_price, "pnl": pnl,
-                "idx": len(df) - 1,
+        Returns:
+            DataFrame с параметрами и метриками по каждой комбинации
+        """
+        if df.empty or len(df) < 200:
+            logger.error(f"Недостаточно данных: {len(df)} свечей (нужно >= 200)")
+            return pd.DataFrame()
+
+        signals = self._prepare_signals(df, symbol)
+        rows = []
+        for size_pct, sl_pct, tp_pct in product(
+            position_size_pcts or [self.position_size_pct], stop_loss_pcts, take_profit_pcts
+        ):
+            backtester = Backtester(
+                initial_balance=self.initial_balance,
+                position_size_pct=size_pct,
+                stop_loss_pct=sl_pct,
+                take_profit_pct=tp_pct,
+                record_equity=self.record_equity,
+            )
+            result = backtester._simulate(signals)
+            rows.append({
+                "position_size_pct": size_pct,
+                "stop_loss_pct": sl_pct,
+                "take_profit_pct": tp_pct,
+                **result.summary(),
             })
+        return pd.DataFrame(rows)
+
+    def _prepare_signals(self, df: pd.DataFrame, symbol: str) -> Tuple[np.ndarray, ...]:
+        """
+        Индикаторы и векторные сигналы стратегии.
+
+        Returns:
+            (close, timestamps, valid, buy_signal, sell_signal)
+        """
+        # Вычисляем индикаторы
+        indicators = self._get_indicators(df, symbol)
+
+        # Один раз переводим всё в ndarray: в цикле только скалярный доступ по индексу.
+        # Ряды, которые сравниваются между собой или с порогами (close, EMA, RSI), —
+        # float64: при ~60000 шаг float32 ~0.004, и EMA20 > EMA50 могло бы перевернуться,
+        # а RSI рядом с 35/65 округлиться на другую сторону порога. Гистограмме MACD
+        # (только знак) и ATR (только проверка на NaN) хватает float32
+        close = df["close"].to_numpy(dtype=np.float64)
+        timestamps = df["timestamp"].to_numpy()
+        rsi_arr = indicators["rsi"].to_numpy(dtype=np.float64)
+        ema20_arr = indicators["ema20"].to_numpy(dtype=np.float64)
+        ema50_arr = indicators["ema50"].to_numpy(dtype=np.float64)
+        macd_hist = indicators["macd_hist"].to_numpy(dtype=np.float32)
+        atr_arr = indicators["atr"].to_numpy(dtype=np.float32)
+
+        # Сигналы считаются векторно; в цикле остаётся только состояние позиции
+        valid = ~(np.isnan(rsi_arr) | np.isnan(atr_arr))
+        buy_signal = valid & (rsi_arr < 35) & (ema20_arr > ema50_arr) & (macd_hist > 0)
+        sell_signal = valid & (rsi_arr > 65)
+
+        return close, timestamps, valid, buy_signal, sell_signal
+
+    def _simulate(self, signals: Tuple[np.ndarray, ...]) -> BacktestResult:
+        """Прогоняет машину состояний по готовым сигналам из _prepare_signals()."""
+        close, timestamps, valid, buy_signal, sell_signal = signals
+
+        equity_curve, trades, balance = _run_core(
+            close, valid, buy_signal, sell_signal,
+            float(self.initial_balance),
+            float(self.position_size_pct),
+            float(self.stop_loss_pct),
+            float(self.take_profit_pct),
+            self._fee_mult,
+            200,  # Пропускаем первые 200 свечей (прогрев индикаторов)
+            self.record_equity,
+        )
+        trades["timestamp"] = timestamps[trades["idx"]]
 
+        result = BacktestResult()
+        result.initial_balance = self.initial_balance
+        result.equity_curve = equity_curve
+        result.trades = trades
         result.final_balance = balance
         return result
 
-    def _close_position(self, position: Dict, sell_price: float) -> float:
-        """Рассчитывает P&L позиции с учётом комиссий."""
-        sell_value = position["qty"] * sell_price
-        fee = sell_value * self.FEE_PCT / 100
-        pnl = sell_value - fee - position["entry_amount"]
-        return pnl
+    def _get_indicators(self, df: pd.DataFrame, symbol: str) -> pd.DataFrame:
+        """
+        Индикаторы стратегии; при заданном indicator_cache_dir — с кэшем в parquet.
+
+        Индикаторы зависят только от OHLC, поэтому при переборе SL/TP
+        по одному и тому же CSV они считаются один раз.
+        """
+        cache_path = None
+        if self.indicator_cache_dir:
+            digest = hashlib.blake2b(digest_size=8)
+            digest.update(str(INDICATOR_CACHE_VERSION).encode())
+            for col in ("high", "low", "close"):
+                digest.update(df[col].to_numpy(dtype=np.float64).tobytes())
+            cache_path = os.path.join(
+                self.indicator_cache_dir, f"{symbol}_{digest.hexdigest()}.parquet"
+            )
+            if os.path.exists(cache_path):
+                try:
+                    return pd.read_parquet(cache_path, columns=INDICATOR_COLUMNS)
+                except Exception as e:
+                    logger.warning(f"Не удалось прочитать кэш индикаторов {cache_path}: {e}")
+
+        indicators = pd.DataFrame({
+            "rsi": calculate_rsi(df),
+            "ema20": calculate_ema(df, 20),
+            "ema50": calculate_ema(df, 50),
+            "macd_hist": calculate_macd(df)["histogram"],
+            "atr": calculate_atr(df),
+        })
+
+        if cache_path:
+            try:
+                os.makedirs(self.indicator_cache_dir, exist_ok=True)
+                indicators.to_parquet(cache_path, engine="pyarrow", compression="zstd")
+            except Exception as e:
+                logger.warning(f"Не удалось сохранить кэш индикаторов {cache_path}: {e}")
+
+        return indicators
+
+
+@njit(cache=True)
+def _run_core(
+    close, valid, buy_signal, sell_signal,
+    initial_balance, position_size_pct, stop_loss_pct, take_profit_pct, fee_mult,
+    warmup, record_equity,
+):
+    """
+    Пошаговая машина состояний бэктеста (позиция, stop-loss, take-profit).
+
+    Зависит от пути, поэтому не векторизуется — компилируется Numba.
+
+    Returns:
+        (equity_curve, trades с dtype TRADE_DTYPE без timestamp, final_balance)
+    """
+    n = close.shape[0]
+    # Баланс накапливается в float64, а в кривую капитала пишется float32
+    equity = np.empty(n - warmup if record_equity else 0, np.float32)
+    # Не больше одной сделки на свечу плюс закрытие в конце данных
+    max_trades = n - warmup + 1
+    trades = np.empty(max_trades, TRADE_DTYPE)
+    n_trades = 0
+
+    # Все деления на константы — вне цикла
+    position_size_frac = position_size_pct / 100
+    stop_loss_mult = 1 - stop_loss_pct / 100
+    take_profit_mult = 1 + take_profit_pct / 100
+
+    balance = initial_balance
+    in_position = False
+    pos_qty = 0.0
+    pos_entry_amount = 0.0
+    stop_loss_price = 0.0
+    take_profit_price = 0.0
+
+    for i in range(warmup, n):
+        price = close[i]
+
+        if not valid[i]:
+            if record_equity:
+                equity[i - warmup] = balance
+            continue
+
+        if in_position:
+            # Текущая стоимость портфеля
+            if record_equity:
+                equity[i - warmup] = balance + pos_qty * price
+
+            # Stop-loss, take-profit или сигнал на продажу (RSI > 65)
+            if price <= stop_loss_price:
+                reason = REASON_STOP_LOSS
+            elif price >= take_profit_price:
+                reason = REASON_TAKE_PROFIT
+            elif sell_signal[i]:
+                reason = REASON_RSI_OVERBOUGHT
+            else:
+                continue
+
+            sell_value = pos_qty * price
+            fee = sell_value * fee_mult
+            balance += sell_value - fee
+            trade = trades[n_trades]
+            trade.idx = i
+            trade.action = TRADE_SELL
+            trade.reason = reason
+            trade.price = price
+            trade.pnl = sell_value - fee - pos_entry_amount
+            n_trades += 1
+            in_position = False
+
+        else:
+            if record_equity:
+                equity[i - warmup] = balance
+
+            # Сигнал на покупку: RSI < 35 И EMA20 > EMA50 И MACD hist > 0
+            if buy_signal[i]:
+                # Размер позиции
+                trade_amount = balance * position_size_frac
+                trade_amount = min(trade_amount, balance - 1)  # Оставляем 1 USDT
+
+                if trade_amount < 1:
+                    continue
+
+                fee = trade_amount * fee_mult
+                pos_qty = (trade_amount - fee) / price
+                pos_entry_amount = trade_amount
+                # Пороги SL/TP считаются один раз при входе, а не на каждой свече
+                stop_loss_price = price * stop_loss_mult
+                take_profit_price = price * take_profit_mult
+                balance -= trade_amount
+                in_position = True
+                trade = trades[n_trades]
+                trade.idx = i
+                trade.action = TRADE_BUY
+                trade.reason = REASON_SIGNAL
+                trade.price = price
+                trade.pnl = 0.0
+                n_trades += 1
+
+    # Закрываем позицию если осталась открытой
+    if in_position:
+        price = close[n - 1]
+        sell_value = pos_qty * price
+        balance += sell_value
+        trade = trades[n_trades]
+        trade.idx = n - 1
+        trade.action = TRADE_SELL
+        trade.reason = REASON_END_OF_DATA
+        trade.price = price
+        trade.pnl = sell_value - sell_value * fee_mult - pos_entry_amount
+        n_trades += 1
+
+    return equity, trades[:n_trades], balance
+
+
+CSV_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
 
 
 def load_data_from_csv(symbol: str) -> Optional[pd.DataFrame]:
@@ -302,7 +528,15 @@ def load_data_from_csv(symbol: str) -> Optional[pd.DataFrame]:
 
     filepath = os.path.join(data_dir, files[0])
     logger.info(f"Загружаем данные из {filepath}")
-    df = pd.read_csv(filepath, parse_dates=["timestamp"])
+    # Многопоточный парсер pyarrow и только нужные бэктесту колонки
+    df = pd.read_csv(
+        filepath,
+        engine="pyarrow",
+        usecols=CSV_COLUMNS,
+        dtype={col: "float64" for col in CSV_COLUMNS if col != "timestamp"},
+    )
+    # pyarrow сам распознаёт ISO-даты, но в секундах — приводим к ns, как у данных с Bybit
+    df["timestamp"] = pd.to_datetime(df["timestamp"], format="ISO8601", cache=True).astype("datetime64[ns]")
     return df
 
 
@@ -312,6 +546,76 @@ def load_data_from_bybit(symbol: str, days: int) -> pd.DataFrame:
     return client.get_historical_data(symbol, days)
 
 
+def _backtest_symbol(
+    symbol: str, days: int, backtester_params: Dict
+) -> Tuple[str, BacktestResult]:
+    """Бэктест одного символа в процессе-воркере run_parallel()."""
+    # CSV в приоритете, чтобы параллельные процессы не нагружали Bybit API
+    df = load_data_from_csv(symbol)
+    if df is None:
+        logger.info(f"CSV для {symbol} не найден, загрузка с Bybit...")
+        df = load_data_from_bybit(symbol, days)
+
+    return symbol, Backtester(**backtester_params).run(df, symbol)
+
+
+def run_parallel(
+    symbols: List[str],
+    days: int = 7,
+    balance: float = 100.0,
+    position_size_pct: float = 5.0,
+    stop_loss_pct: float = 5.0,
+    take_profit_pct: float = 3.0,
+    max_workers: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Прогоняет бэктесты по нескольким символам параллельно, по процессу на символ.
+
+    Args:
+        symbols: Список торговых пар
+        days: Дней истории (если CSV не найден и данные грузятся с Bybit)
+        balance: Начальный баланс USDT
+        position_size_pct: Размер позиции % от портфеля
+        stop_loss_pct: Stop-loss %
+        take_profit_pct: Take-profit %
+        max_workers: Количество процессов (по умолчанию — число ядер)
+
+    Returns:
+        DataFrame со сводкой результатов по каждому символу
+    """
+    if not symbols:
+        return pd.DataFrame()
+
+    backtester_params = {
+        "initial_balance": balance,
+        "position_size_pct": position_size_pct,
+        "stop_loss_pct": stop_loss_pct,
+        "take_profit_pct": take_profit_pct,
+        "indicator_cache_dir": INDICATOR_CACHE_DIR,
+    }
+    max_workers = min(max_workers or os.cpu_count() or 1, len(symbols))
+
+    results: Dict[str, BacktestResult] = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(_backtest_symbol, symbol, days, backtester_params): symbol
+            for symbol in symbols
+        }
+        for future in as_completed(futures):
+            symbol = futures[future]
+            try:
+                _, results[symbol] = future.result()
+            except Exception as e:
+                logger.error(f"Ошибка бэктеста {symbol}: {e}", exc_info=True)
+
+    rows = []
+    for symbol in symbols:
+        if symbol not in results:
+            continue
+        rows.append({"symbol": symbol, **results[symbol].summary()})
+    return pd.DataFrame(rows)
+
+
 def main():
     parser = argparse.ArgumentParser(description="Бэктестер торговой стратегии")
     parser.add_argument("--symbol", default="BTCUSDT", help="Торговая пара")
@@ -321,8 +625,27 @@ def main():
     parser.add_argument("--stop-loss", type=float, default=5.0, help="Stop-loss %%")
     parser.add_argument("--take-profit", type=float, default=3.0, help="Take-profit %%")
     parser.add_argument("--from-csv", action="store_true", help="Загрузить из CSV вместо Bybit")
+    parser.add_argument("--symbols", help="Несколько пар через запятую — параллельный прогон")
+    parser.add_argument("--workers", type=int, default=None, help="Количество процессов для --symbols")
     args = parser.parse_args()
 
+    if args.symbols:
+        symbols = [s.strip() for s in args.symbols.split(",") if s.strip()]
+        summary = run_parallel(
+            symbols,
+            days=args.days,
+            balance=args.balance,
+            position_size_pct=args.position_size,
+            stop_loss_pct=args.stop_loss,
+            take_profit_pct=args.take_profit,
+            max_workers=args.workers,
+        )
+        if summary.empty:
+            logger.error("Нет результатов бэктеста")
+            sys.exit(1)
+        print(summary.to_string(index=False, float_format=lambda x: f"{x:.2f}"))
+        return
+
     # Загружаем данные
     if args.from_csv:
         df = load_data_from_csv(args.symbol)
@@ -345,6 +668,7 @@ def main():
         position_size_pct=args.position_size,
         stop_loss_pct=args.stop_loss,
         take_profit_pct=args.take_profit,
+        indicator_cache_dir=INDICATOR_CACHE_DIR,
     )
     result = bt.run(df, args.symbol)
     result.print_report()
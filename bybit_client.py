@@ -1,27 +1,123 @@
 from pybit.unified_trading import HTTP
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-import time
+import numpy as np
 import pandas as pd
 import logging
-from typing import List, Dict, Optional
+import queue
+import threading
+import time
+from typing import Iterator, List, Dict, Optional, Tuple
 from config import config
 
 logger = logging.getLogger(__name__)
 
+# Максимум свечей в одном ответе get_kline
+KLINE_PAGE_LIMIT = 200
+# Колонки свечи Bybit после timestamp
+KLINE_COLUMNS = ["open", "high", "low", "close", "volume", "turnover"]
+# Параллельных запросов свечей (лимит Bybit — 600 запросов за 5 секунд с IP)
+KLINE_FETCH_WORKERS = 5
+# Общий темп запросов свечей по всем потокам, с запасом до лимита Bybit
+KLINE_REQUESTS_PER_SECOND = 10
+# Попыток на окно; пауза между ними удваивается (в том числе при rate limit)
+KLINE_FETCH_ATTEMPTS = 3
+KLINE_RETRY_DELAY = 0.5
+# Нечисловые интервалы Bybit в минутах; для месяца берётся минимальная длина,
+# чтобы окно гарантированно вмещало не больше KLINE_PAGE_LIMIT свечей
+KLINE_INTERVAL_MINUTES = {"D": 24 * 60, "W": 7 * 24 * 60, "M": 28 * 24 * 60}
 
-class BybitClient:
-    def __init__(self):
-        self.client = HTTP(
+
+class KlineFetchError(Exception):
+    """Окно свечей не загрузилось: история вышла бы короче запрошенной."""
+
+
+class _RateLimiter:
+    """Выдает запросы не чаще rate в секунду суммарно по всем потокам."""
+    
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self.next_time = 0.0
+        self.lock = threading.Lock()
+    
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_time)
+            self.next_time = slot + self.interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+_kline_rate_limiter = _RateLimiter(KLINE_REQUESTS_PER_SECOND)
+
+
+def _interval_to_minutes(interval: str) -> int:
+    """Длина интервала свечи Bybit ("5", "60", "D", ...) в минутах."""
+    if interval in KLINE_INTERVAL_MINUTES:
+        return KLINE_INTERVAL_MINUTES[interval]
+    return int(interval)
+
+
+# Один pybit-клиент на процесс: все экземпляры BybitClient (агент, бэктестер)
+# переиспользуют keep-alive соединения его requests.Session
+_http_client: Optional[HTTP] = None
+
+
+def _get_http_client() -> HTTP:
+    """Ленивая инициализация общего pybit HTTP-клиента."""
+    global _http_client
+    if _http_client is None:
+        _http_client = HTTP(
             testnet=config.BYBIT_TESTNET,
             api_key=config.BYBIT_API_KEY,
             api_secret=config.BYBIT_API_SECRET,
             timeout=30,  # Добавляем таймаут 30 секунд
         )
+    return _http_client
+
+
+# Свечи грузятся из нескольких потоков, а requests.Session не гарантирует
+# потокобезопасность: каждый запрос берет из пула свой pybit-клиент (свою Session).
+# Клиенты возвращаются в пул и переиспользуются следующими загрузками
+_kline_clients: "queue.SimpleQueue[HTTP]" = queue.SimpleQueue()
+
+
+def _create_kline_client() -> HTTP:
+    """pybit-клиент для публичного эндпоинта свечей (ключи не нужны)."""
+    return HTTP(testnet=config.BYBIT_TESTNET, timeout=30)
+
+
+@contextmanager
+def _kline_client() -> Iterator[HTTP]:
+    """Клиент из пула на время одного запроса."""
+    try:
+        client = _kline_clients.get_nowait()
+    except queue.Empty:
+        client = _create_kline_client()
+    try:
+        yield client
+    finally:
+        _kline_clients.put(client)
+
+
+class BybitClient:
+    def __init__(self):
+        self.client = _get_http_client()
     
-    def get_klines(self, symbol: str, interval: str, start_time: int, end_time: int, max_requests: int = 50) -> List[Dict]:
+    def get_klines(
+        self, symbol: str, interval: str, start_time: int, end_time: int, max_requests: int = 50
+    ) -> Tuple[np.ndarray, np.ndarray]:
         """
         Получение исторических данных (свечей) для указанного символа.
         
+        Диапазон заранее делится на окна по KLINE_PAGE_LIMIT свечей, и окна
+        запрашиваются параллельно, а не по одному с ожиданием каждого ответа.
+        Общий темп запросов ограничен KLINE_REQUESTS_PER_SECOND, неудачное окно
+        повторяется с нарастающей паузой.
+        
         Args:
             symbol: Торговая пара (например, BTCUSDT)
             interval: Интервал свечи (5 = 5 минут)
@@ -30,81 +126,127 @@ class BybitClient:
             max_requests: Максимальное количество запросов (защита от бесконечного цикла)
         
         Returns:
-            Список свечей
+            (timestamps int64 в мс, массив (N, 6) float64 с колонками KLINE_COLUMNS),
+            отсортированные по возрастанию времени
+        
+        Raises:
+            KlineFetchError: окно не загрузилось после KLINE_FETCH_ATTEMPTS попыток
         """
-        all_klines = []
-        current_start = start_time
-        request_count = 0
-        seen_timestamps = set()  # Для отслеживания дубликатов
-        
-        logger.info(f"Начало загрузки данных для {symbol}...")
-        
-        # Bybit ограничивает количество записей за запрос, поэтому делаем пагинацию
-        while current_start < end_time and request_count < max_requests:
-            try:
-                request_count += 1
-                logger.debug(f"Запрос {request_count}/{max_requests} для {symbol}")
-                
-                response = self.client.get_kline(
-                    category="spot",
-                    symbol=symbol,
-                    interval=interval,
-                    start=current_start,
-                    end=end_time,
-                    limit=200  # Уменьшаем лимит для более быстрых запросов
+        # Окна от новых к старым, каждое вмещает не больше одной страницы свечей
+        window_ms = KLINE_PAGE_LIMIT * _interval_to_minutes(interval) * 60_000
+        windows = []
+        window_end = end_time
+        while window_end > start_time and len(windows) < max_requests:
+            window_start = max(start_time, window_end - window_ms + 1)
+            windows.append((window_start, window_end))
+            window_end = window_start - 1
+        
+        if window_end > start_time:
+            logger.warning(f"Достигнут лимит запросов ({max_requests}) для {symbol}")
+        
+        # Свечи сразу разбираются в типизированные буферы; column-major,
+        # чтобы каждая колонка DataFrame была непрерывным куском памяти.
+        # Страницы идут от новых к старым, поэтому буфер заполняется с конца —
+        # в итоге он уже упорядочен по возрастанию времени
+        capacity = len(windows) * KLINE_PAGE_LIMIT
+        ts_buf = np.empty(capacity, dtype=np.int64)
+        values_buf = np.empty((capacity, len(KLINE_COLUMNS)), dtype=np.float64, order="F")
+        count = 0
+        # Страницы идут от новых к старым, поэтому дубликат — это любая свеча
+        # не старше самой старой уже полученной; множество timestamp'ов не нужно
+        oldest_seen = np.iinfo(np.int64).max
+        
+        logger.info(f"Начало загрузки данных для {symbol} ({len(windows)} запросов)...")
+        
+        def fetch_window(window: Tuple[int, int]) -> Optional[List]:
+            delay = KLINE_RETRY_DELAY
+            for attempt in range(1, KLINE_FETCH_ATTEMPTS + 1):
+                _kline_rate_limiter.wait()
+                with _kline_client() as client:
+                    klines = self._get_kline_page(client, symbol, interval, *window)
+                if klines is not None or attempt == KLINE_FETCH_ATTEMPTS:
+                    return klines
+                logger.warning(
+                    f"Повторный запрос свечей {symbol} за окно {window[0]}-{window[1]} "
+                    f"через {delay:.1f} с (попытка {attempt + 1}/{KLINE_FETCH_ATTEMPTS})"
                 )
-                
-                if response["retCode"] == 0 and response["result"]["list"]:
-                    klines = response["result"]["list"]
-                    
-                    # Bybit возвращает данные в обратном порядке (от новых к старым)
-                    # Поэтому первый элемент - самый новый, последний - самый старый
-                    
-                    # Фильтруем дубликаты
-                    new_klines = []
-                    for kline in klines:
-                        timestamp = int(kline[0])
-                        if timestamp not in seen_timestamps:
-                            seen_timestamps.add(timestamp)
-                            new_klines.append(kline)
-                    
-                    # Если нет новых данных, выходим из цикла
-                    if not new_klines:
-                        logger.info(f"Получены только дубликаты. Загрузка завершена. Всего свечей: {len(all_klines)}")
-                        break
-                    
-                    all_klines.extend(new_klines)
-                    logger.debug(f"Получено {len(new_klines)} новых свечей для {symbol}, всего: {len(all_klines)}")
-                    
-                    # Получаем самую старую временную метку (последний элемент)
-                    oldest_timestamp = int(klines[-1][0])
-                    
-                    # Если получили меньше лимита, значит данных больше нет
-                    if len(klines) < 200:
-                        logger.info(f"Загрузка данных для {symbol} завершена. Всего свечей: {len(all_klines)}")
-                        break
-                    
-                    # Проверяем, что самая старая свеча старше текущего start
-                    if oldest_timestamp <= current_start:
-                        logger.info(f"Достигнут начальный timestamp ({oldest_timestamp}), загрузка завершена")
-                        break
-                    
-                    # Следующий запрос - до самой старой полученной свечи
-                    # Обновляем end_time вместо current_start
-                    end_time = oldest_timestamp - 1
-                    time.sleep(0.2)  # Увеличиваем задержку для избежания rate limit
-                else:
-                    logger.warning(f"Пустой ответ от Bybit для {symbol}: {response.get('retMsg', 'Unknown error')}")
+                time.sleep(delay)
+                delay *= 2
+        
+        with ThreadPoolExecutor(max_workers=KLINE_FETCH_WORKERS) as executor:
+            # Futures в порядке окон, поэтому страницы обрабатываются от новых к старым
+            futures = [executor.submit(fetch_window, window) for window in windows]
+            for window, future in zip(windows, futures):
+                klines = future.result()
+                if klines is None:
+                    for pending in futures:
+                        pending.cancel()
+                    raise KlineFetchError(
+                        f"Не удалось загрузить свечи {symbol} за окно {window[0]}-{window[1]} "
+                        f"после {KLINE_FETCH_ATTEMPTS} попыток"
+                    )
+                # Пустое окно — более старых данных нет (например, до листинга);
+                # останавливаемся, чтобы не получить разрыв в середине ряда
+                if not klines:
+                    for pending in futures:
+                        pending.cancel()
+                    logger.warning(
+                        f"История {symbol} обрезана (пустой ответ за окно {window[0]}-{window[1]}): "
+                        f"нет свечей за {windows[-1][0]}-{window[1]}"
+                    )
                     break
-                    
-            except Exception as e:
-                logger.error(f"Ошибка при получении данных для {symbol}: {e}")
-                break
+                
+                # Bybit возвращает данные в обратном порядке (от новых к старым)
+                # Поэтому первый элемент - самый новый, последний - самый старый
+                page = np.asarray(klines)
+                page_ts = page[:, 0].astype(np.int64)
+                
+                # Фильтруем дубликаты: свеча новая, если она строго старше
+                # всех предыдущих (включая более ранние строки этой страницы)
+                older_than = np.minimum.accumulate(np.concatenate(([oldest_seen], page_ts[:-1])))
+                is_new = page_ts < older_than
+                new_count = int(is_new.sum())
+                oldest_seen = min(oldest_seen, int(page_ts.min()))
+                
+                lo = capacity - count - new_count
+                hi = capacity - count
+                ts_buf[lo:hi] = page_ts[is_new][::-1]
+                values_buf[lo:hi] = page[is_new, 1:][::-1].astype(np.float64)
+                count += new_count
+                logger.debug(f"Получено {new_count} новых свечей для {symbol}, всего: {count}")
         
-        if request_count >= max_requests:
-            logger.warning(f"Достигнут лимит запросов ({max_requests}) для {symbol}")
+        logger.info(f"Загрузка данных для {symbol} завершена. Всего свечей: {count}")
         
-        return all_klines
+        return ts_buf[capacity - count:], values_buf[capacity - count:]
+    
+    def _get_kline_page(
+        self, client: HTTP, symbol: str, interval: str, start: int, end: int
+    ) -> Optional[List]:
+        """
+        Одна страница свечей за окно [start, end].
+        
+        Args:
+            client: pybit-клиент текущего потока загрузки (из _kline_client())
+        
+        Returns:
+            Список свечей от новых к старым (может быть пустым) или None при ошибке
+        """
+        try:
+            response = client.get_kline(
+                category="spot",
+                symbol=symbol,
+                interval=interval,
+                start=start,
+                end=end,
+                limit=KLINE_PAGE_LIMIT
+            )
+            if response["retCode"] != 0:
+                logger.warning(f"Пустой ответ от Bybit для {symbol}: {response.get('retMsg', 'Unknown error')}")
+                return None
+            return response["result"]["list"]
+        except Exception as e:
+            logger.error(f"Ошибка при получении данных для {symbol}: {e}")
+            return None
     
     def get_historical_data(self, symbol: str, days: int = 7) -> pd.DataFrame:
         """
@@ -116,30 +258,28 @@ class BybitClient:
         
         Returns:
             DataFrame с историческими данными
+        
+        Raises:
+            KlineFetchError: часть истории не загрузилась
         """
         logger.info(f"Запрос данных для {symbol} за последние {days} дней")
         end_time = int(datetime.now().timestamp() * 1000)
         start_time = int((datetime.now() - timedelta(days=days)).timestamp() * 1000)
         
-        klines = self.get_klines(symbol, config.KLINE_INTERVAL, start_time, end_time)
+        timestamps, values = self.get_klines(symbol, config.KLINE_INTERVAL, start_time, end_time)
         
-        if not klines:
+        if len(timestamps) == 0:
             logger.warning(f"Не получено данных для {symbol}")
             return pd.DataFrame()
         
-        logger.info(f"Получено {len(klines)} свечей для {symbol}")
-        
-        # Преобразуем в DataFrame
-        df = pd.DataFrame(klines, columns=[
-            "timestamp", "open", "high", "low", "close", "volume", "turnover"
-        ])
-        
-        # Конвертируем типы данных
-        df["timestamp"] = pd.to_datetime(df["timestamp"].astype(int), unit="ms")
-        for col in ["open", "high", "low", "close", "volume", "turnover"]:
-            df[col] = df[col].astype(float)
+        logger.info(f"Получено {len(timestamps)} свечей для {symbol}")
         
-        df = df.sort_values("timestamp").reset_index(drop=True)
+        # Преобразуем в DataFrame: колонки уже нужных типов и непрерывны в памяти,
+        # поэтому pandas берёт их как есть, без транспонирования и копирования
+        columns = {"timestamp": pd.to_datetime(timestamps, unit="ms")}
+        for j, col in enumerate(KLINE_COLUMNS):
+            columns[col] = values[:, j]
+        df = pd.DataFrame(columns, copy=False)
         
         # Проверяем полноту данных
         if not df.empty:
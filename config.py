@@ -1,69 +1,158 @@
 import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Tuple
 from dotenv import load_dotenv
 
-load_dotenv()
+# Значение целиком сравнивается с набором: опечатка вроде "tru" или "10"
+# не должна включать testnet или реальную торговлю
+_TRUE_VALUES = frozenset({"true", "1", "yes", "y"})
 
 
-class Config:
+def _parse_bool(value: str) -> bool:
+    return value.strip().lower() in _TRUE_VALUES
+
+
+def _parse_symbols(value: str) -> Tuple[str, ...]:
+    return tuple(s.strip() for s in value.split(",") if s.strip())
+
+
+def _parse_upper(value: str) -> str:
+    return value.upper()
+
+
+# Переменные окружения: имя -> (значение по умолчанию, преобразование).
+# Преобразование применяется только к значениям из окружения, умолчания уже типизированы.
+_ENV_SCHEMA = {
     # Bybit
-    BYBIT_API_KEY = os.getenv("BYBIT_API_KEY")
-    BYBIT_API_SECRET = os.getenv("BYBIT_API_SECRET")
-    BYBIT_TESTNET = os.getenv("BYBIT_TESTNET", "false").lower() == "true"
-    
+    "BYBIT_API_KEY": (None, str),
+    "BYBIT_API_SECRET": (None, str),
+    "BYBIT_TESTNET": (False, _parse_bool),
+
     # AI Provider (DeepSeek or OpenRouter)
-    AI_PROVIDER = os.getenv("AI_PROVIDER", "deepseek")  # "deepseek" или "openrouter"
-    
+    "AI_PROVIDER": ("deepseek", str),  # "deepseek" или "openrouter"
+
     # DeepSeek
-    DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
-    DEEPSEEK_API_BASE = os.getenv("DEEPSEEK_API_BASE", "https://api.deepseek.com")
-    DEEPSEEK_MODEL = os.getenv("DEEPSEEK_MODEL", "deepseek-chat")
-    
+    "DEEPSEEK_API_KEY": (None, str),
+    "DEEPSEEK_API_BASE": ("https://api.deepseek.com", str),
+    "DEEPSEEK_MODEL": ("deepseek-chat", str),
+
     # OpenRouter
-    OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
-    OPENROUTER_API_BASE = os.getenv("OPENROUTER_API_BASE", "https://openrouter.ai/api/v1")
-    OPENROUTER_MODEL = os.getenv("OPENROUTER_MODEL", "deepseek/deepseek-chat")
-    
+    "OPENROUTER_API_KEY": (None, str),
+    "OPENROUTER_API_BASE": ("https://openrouter.ai/api/v1", str),
+    "OPENROUTER_MODEL": ("deepseek/deepseek-chat", str),
+
     # Trading parameters
-    MAX_TRADING_VOLUME = float(os.getenv("MAX_TRADING_VOLUME", "100"))
+    "MAX_TRADING_VOLUME": (100.0, float),
     # Список торговых инструментов для анализа и торговли
-    TRADING_PAIRS = os.getenv(
-        "TRADING_PAIRS", 
-        "BTCUSDT,ETHUSDT,SOLUSDT,XAUTUSDT"
-    ).split(",")
-    MAX_TRADE_AMOUNT = float(os.getenv("MAX_TRADE_AMOUNT", "10"))
-    INTERVAL_MINUTES = int(os.getenv("INTERVAL_MINUTES", "15"))
-    
+    "TRADING_PAIRS": (("BTCUSDT", "ETHUSDT", "SOLUSDT", "XAUTUSDT"), _parse_symbols),
+    "MAX_TRADE_AMOUNT": (10.0, float),
+    "INTERVAL_MINUTES": (15, int),
+
     # Risk management
-    STOP_LOSS_PCT = float(os.getenv("STOP_LOSS_PCT", "5.0"))  # Макс. убыток на позицию %
-    TAKE_PROFIT_PCT = float(os.getenv("TAKE_PROFIT_PCT", "3.0"))  # Цель прибыли %
-    MAX_DAILY_LOSS = float(os.getenv("MAX_DAILY_LOSS", "20.0"))  # Макс. дневной убыток USDT
-    MIN_CONFIDENCE = int(os.getenv("MIN_CONFIDENCE", "60"))  # Мин. уверенность AI для сделки (0-100)
-    POSITION_SIZE_PCT = float(os.getenv("POSITION_SIZE_PCT", "5.0"))  # Размер позиции % от портфеля
-    
+    "STOP_LOSS_PCT": (5.0, float),  # Макс. убыток на позицию %
+    "TAKE_PROFIT_PCT": (3.0, float),  # Цель прибыли %
+    "MAX_DAILY_LOSS": (20.0, float),  # Макс. дневной убыток USDT
+    "MIN_CONFIDENCE": (60, int),  # Мин. уверенность AI для сделки (0-100)
+    "POSITION_SIZE_PCT": (5.0, float),  # Размер позиции % от портфеля
+
     # Trade history
-    TRADES_DB_PATH = os.getenv("TRADES_DB_PATH", "trades.db")
-    
+    "TRADES_DB_PATH": ("trades.db", str),
+
     # Debug/Testing flags
-    ENABLE_AI_ANALYSIS = os.getenv("ENABLE_AI_ANALYSIS", "true").lower() == "true"
-    ENABLE_TRADING = os.getenv("ENABLE_TRADING", "true").lower() == "true"
-    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()  # DEBUG, INFO, WARNING, ERROR
-    
-    # Data collection parameters
-    HISTORICAL_DAYS = 7  # Изменено с месяцев на дни для быстрой работы
-    KLINE_INTERVAL = "5"  # 5 minutes
-    
-    # Market data symbols (для анализа корреляций)
-    GOLD_SYMBOL = "XAUTUSDT"  # Золото с Bybit
-    
+    "ENABLE_AI_ANALYSIS": (True, _parse_bool),
+    "ENABLE_TRADING": (True, _parse_bool),
+    "LOG_LEVEL": ("INFO", _parse_upper),  # DEBUG, INFO, WARNING, ERROR
+    "SAVE_CHARTS": (False, _parse_bool),  # Сохранять графики в charts/
+
+    # Limit order settings
+    "USE_LIMIT_ORDERS": (True, _parse_bool),
+    "LIMIT_ORDER_OFFSET_PCT": (0.05, float),  # Offset от рыночной цены %
+
+    # Polymarket
+    "POLYMARKET_CONDITION_ID": (
+        "0x7a61644000000000000000000000000000000000000000000000000000000000",  # Placeholder — нужно обновить на актуальный
+        str,
+    ),
+}
+
+
+@dataclass(frozen=True, slots=True)
+class Config:
+    # Bybit
+    BYBIT_API_KEY: Optional[str]
+    BYBIT_API_SECRET: Optional[str]
+    BYBIT_TESTNET: bool
+
+    # AI Provider (DeepSeek or OpenRouter)
+    AI_PROVIDER: str
+
+    # DeepSeek
+    DEEPSEEK_API_KEY: Optional[str]
+    DEEPSEEK_API_BASE: str
+    DEEPSEEK_MODEL: str
+
+    # OpenRouter
+    OPENROUTER_API_KEY: Optional[str]
+    OPENROUTER_API_BASE: str
+    OPENROUTER_MODEL: str
+
+    # Trading parameters
+    MAX_TRADING_VOLUME: float
+    TRADING_PAIRS: Tuple[str, ...]
+    MAX_TRADE_AMOUNT: float
+    INTERVAL_MINUTES: int
+
+    # Risk management
+    STOP_LOSS_PCT: float
+    TAKE_PROFIT_PCT: float
+    MAX_DAILY_LOSS: float
+    MIN_CONFIDENCE: int
+    POSITION_SIZE_PCT: float
+
+    # Trade history
+    TRADES_DB_PATH: str
+
+    # Debug/Testing flags
+    ENABLE_AI_ANALYSIS: bool
+    ENABLE_TRADING: bool
+    LOG_LEVEL: str
+    SAVE_CHARTS: bool
+
     # Limit order settings
-    USE_LIMIT_ORDERS = os.getenv("USE_LIMIT_ORDERS", "true").lower() == "true"
-    LIMIT_ORDER_OFFSET_PCT = float(os.getenv("LIMIT_ORDER_OFFSET_PCT", "0.05"))  # Offset от рыночной цены %
-    
+    USE_LIMIT_ORDERS: bool
+    LIMIT_ORDER_OFFSET_PCT: float
+
     # Polymarket
-    POLYMARKET_CONDITION_ID = os.getenv(
-        "POLYMARKET_CONDITION_ID",
-        "0x7a61644000000000000000000000000000000000000000000000000000000000"  # Placeholder — нужно обновить на актуальный
-    )
+    POLYMARKET_CONDITION_ID: str
+
+    # Data collection parameters
+    HISTORICAL_DAYS: int = 7  # Изменено с месяцев на дни для быстрой работы
+    KLINE_INTERVAL: str = "5"  # 5 minutes
+
+    # Market data symbols (для анализа корреляций)
+    GOLD_SYMBOL: str = "XAUTUSDT"  # Золото с Bybit
+
+
+def _load_env() -> Config:
+    """Собирает Config за один проход по снимку окружения."""
+    env = os.environ.copy()
+    values = {}
+    for name, (default, cast) in _ENV_SCHEMA.items():
+        raw = env.get(name)
+        values[name] = default if raw is None else cast(raw)
+    return Config(**values)
+
+
+@lru_cache(maxsize=None)
+def get_config() -> Config:
+    """Возвращает единственный экземпляр Config, читая .env при первом вызове."""
+    load_dotenv()
+    return _load_env()
 
 
-config = Config()
+def __getattr__(name: str):
+    # `from config import config` разбирает окружение только при первом обращении
+    if name == "config":
+        return get_config()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,37 +1,485 @@
-from openai import OpenAI
+import numpy as np
+import msgspec
 import pandas as pd
-import json
+import asyncio
 import logging
 import httpx
-import base64
 import io
 import os
-from datetime import datetime
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-import mplfinance as mpf
-from typing import Dict, Optional, Tuple, List
+import re
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
 from config import config
 
+try:
+    import pybase64 as base64  # SIMD-реализация с тем же API, что и у стандартного base64
+except ImportError:
+    import base64
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
+
 logger = logging.getLogger(__name__)
 
+OHLCV_COLUMNS = ["open", "high", "low", "close", "volume"]
+SUMMARY_CANDLES = 288  # Сутки 5-минутных свечей
+DETAIL_CANDLES = 50
+CHART_CANDLES = 2016  # 7 дней 5-минутных свечей
+MPF_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+CHART_MAX_POINTS = 200  # Свечей на графике после агрегации
+CHART_X_TICKS = 8
+# Формат изображения графика: lossy WebP в несколько раз меньше PNG, что сокращает
+# размер запроса к vision API. Для моделей, не принимающих WebP, — "png".
+CHART_FORMAT = "webp"
+# Формат -> (имя формата Pillow, параметры кодирования, MIME-тип)
+CHART_ENCODINGS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}, "image/webp"),
+    "png": ("PNG", {"compress_level": 1}, "image/png"),  # Быстрое сжатие zlib
+}
+# Куда сохраняются графики при SAVE_CHARTS=true
+CHARTS_DIR = "charts"
+
+# Подстроки в имени модели, означающие поддержку изображений
+VISION_MODEL_TAGS = ("vision", "gpt-4", "claude-3", "gemini", "llava", "pixtral", "-vl")
+
+# Отдельные таймауты вместо общих 30 с: зависшее соединение не ждет полный таймаут чтения
+HTTP_TIMEOUT = httpx.Timeout(connect=5.0, read=30.0, write=10.0, pool=5.0)
+# Пул рассчитан на параллельные запросы по всем парам; keep-alive сохраняет TLS-сессии между итерациями
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=40, keepalive_expiry=30.0)
+# HTTP/2 мультиплексирует параллельные запросы по парам в одном TLS-соединении (нужен пакет h2)
+HTTP2 = True
+
+# Секции золота/серебра/Polymarket одинаковы для всех пар в пределах интервала
+CORRELATION_CACHE_SIZE = 4
+_correlation_cache: "OrderedDict[Tuple, List[str]]" = OrderedDict()
+
+# Готовые изображения графиков: (symbol, title, ключ данных) -> байты изображения
+CHART_CACHE_SIZE = 32
+_chart_cache: "OrderedDict[Tuple, bytes]" = OrderedDict()
+
+# Блок кода в ответе модели (```json ... ```), закрывающие кавычки могут отсутствовать
+_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)(?:```|\Z)", re.S)
+
+
+RECOMMENDATION_ACTIONS = frozenset({"buy", "sell", "hold"})
+
+
+class Recommendation(msgspec.Struct, omit_defaults=True):
+    """
+    Схема рекомендации модели: разбор JSON и валидация за один проход.
+
+    Проверка не строже прежней (нужно только допустимое action): декодер работает
+    с strict=False, поэтому числа строками ("80") приводятся к числам, null
+    в reasoning допустим, а регистр action не важен.
+    """
+    action: str
+    price_from: Optional[float] = None
+    price_to: Optional[float] = None
+    quantity_usdt: Optional[float] = None
+    confidence: Union[int, float] = 0
+    reasoning: Optional[str] = ""
+    symbol: Optional[str] = None  # Только в пакетном ответе
+
+    def __post_init__(self):
+        action = self.action.strip().lower()
+        if action not in RECOMMENDATION_ACTIONS:
+            raise ValueError(f"недопустимое действие {self.action!r}")
+        self.action = action
+
+
+class RecommendationBatch(msgspec.Struct):
+    """Пакетный ответ; элементы разбираются по отдельности, чтобы ошибка в одном не отбрасывала остальные."""
+    recommendations: List[msgspec.Raw] = []
+
+
+_RECOMMENDATION_DECODER = msgspec.json.Decoder(Recommendation, strict=False)
+_BATCH_DECODER = msgspec.json.Decoder(Union[RecommendationBatch, List[msgspec.Raw]])
+
+# Неизменные части промпта собираются один раз при импорте модуля
+SYSTEM_PROMPT = (
+    "Ты количественный трейдер. Отвечай только в формате JSON.\n\n"
+    "СТРАТЕГИЯ:\n"
+    "1. Momentum: покупай при восходящем тренде (EMA20>EMA50>EMA200) и растущем MACD.\n"
+    "2. Mean Reversion: покупай при отскоке от нижней Bollinger Band + RSI<30.\n"
+    "3. НЕ торгуй если ожидаемый профит < 0.3% (комиссия round-trip = 0.2%).\n"
+    "4. В сомнениях — всегда hold."
+)
+
+# Промпт собирается так, чтобы неизменная часть (правила и формат ответа) шла в начале,
+# а рыночные данные — в конце: провайдеры кешируют совпадающий префикс запроса.
+PROMPT_PREFIX = """Ты профессиональный количественный трейдер. Принимай решения на основе технических индикаторов и данных, а не интуиции.
+
+"""
+
+PROMPT_RULES = """ПРАВИЛА ПРИНЯТИЯ РЕШЕНИЙ:
+1. Используй предоставленные технические индикаторы (RSI, EMA, MACD, Bollinger Bands, ATR) как основу решения.
+2. НЕ покупай при RSI > 70 (перекуплен). НЕ продавай при RSI < 30 (перепродан).
+3. Торгуй по тренду: покупай когда EMA20 > EMA50 > EMA200, продавай при обратном.
+4. Учитывай ширину Bollinger Bands — узкие полосы = скорый сильный ход.
+5. Если нет чёткого сигнала — выбирай hold. Лучше пропустить сделку, чем потерять на комиссиях.
+6. Учитывай текущий портфель: не покупай то, чего и так много. Продавай с прибылью.
+7. Анализируй свои прошлые сделки: если последние сделки убыточные, будь осторожнее.
+8. Данные по золоту/серебру — ТОЛЬКО для анализа корреляции, мы ими НЕ торгуем.
+
+"""
+
+PROMPT_FORMAT = """ФОРМАТ ОТВЕТА (строго JSON):
+{
+    "action": "buy" | "sell" | "hold",
+    "price_from": число или null,
+    "price_to": число или null,
+"""
+
+PROMPT_FORMAT_END = """    "confidence": число от 0 до 100,
+    "reasoning": "краткое объяснение с указанием конкретных индикаторов"
+}
+
+ДАННЫЕ ДЛЯ АНАЛИЗА:
+"""
+
+PROMPT_SUFFIX = """- Комиссия Bybit: 0.1% за сделку (учитывай при расчёте целесообразности)
+
+ВАЖНО: Ответь ТОЛЬКО JSON, без дополнительного текста. Поле confidence — твоя уверенность в рекомендации от 0 до 100."""
+
+BATCH_PROMPT_FORMAT = """ФОРМАТ ОТВЕТА (строго JSON):
+{
+    "recommendations": [
+        {
+            "symbol": "торговая пара",
+            "action": "buy" | "sell" | "hold",
+            "price_from": число или null,
+            "price_to": число или null,
+"""
+
+BATCH_PROMPT_FORMAT_END = """            "confidence": число от 0 до 100,
+            "reasoning": "краткое объяснение с указанием конкретных индикаторов"
+        }
+    ]
+}
+
+ДАННЫЕ ДЛЯ АНАЛИЗА:
+"""
+
+BATCH_PROMPT_SUFFIX = """- Комиссия Bybit: 0.1% за сделку (учитывай при расчёте целесообразности)
+
+ВАЖНО: Ответь ТОЛЬКО JSON, без дополнительного текста. Дай ровно одну рекомендацию для каждой торговой пары. Поле confidence — твоя уверенность в рекомендации от 0 до 100."""
+
+
+class _JsonEndTracker:
+    """
+    Отслеживает баланс скобок в потоке ответа модели (строки JSON учитываются),
+    чтобы прекратить чтение сразу после закрытия корневого объекта или массива.
+    """
+    __slots__ = ("depth", "in_string", "escape", "started", "end")
+    
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.started = False
+        self.end = 0  # Позиция сразу за JSON в последнем фрагменте
+    
+    def feed(self, text: str) -> bool:
+        """
+        Обрабатывает очередной фрагмент, возвращает True, если JSON завершен;
+        тогда text[:self.end] — часть фрагмента до конца JSON включительно.
+        """
+        for i, ch in enumerate(text):
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+            elif not self.started:
+                # Текст до корня JSON (например, ```json) пропускаем;
+                # корнем может быть объект или массив (пакетный ответ)
+                if ch == "{" or ch == "[":
+                    self.started = True
+                    self.depth = 1
+            elif ch == '"':
+                self.in_string = True
+            elif ch in "{[":
+                self.depth += 1
+            elif ch in "}]":
+                self.depth -= 1
+                if self.depth == 0:
+                    self.end = i + 1
+                    return True
+        return False
+
+
+def _ohlcv_arrays(df: pd.DataFrame, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Извлекает из DataFrame метки времени и матрицу OHLCV последних n свечей,
+    дальше работа идет только с массивами NumPy.
+    
+    Столбцы берутся по отдельности и срезаются как массивы: без iloc и df[список],
+    которые строят промежуточные DataFrame (в ~8 раз медленнее).
+    
+    Args:
+        df: DataFrame с данными OHLCV
+        n: Количество последних свечей
+    
+    Returns:
+        Кортеж (timestamps datetime64[ns], values формы (n, 5) в порядке OHLCV_COLUMNS)
+    """
+    timestamps = df["timestamp"].to_numpy(dtype="datetime64[ns]")[-n:]
+    values = np.column_stack([df[column].to_numpy(dtype=np.float64)[-n:] for column in OHLCV_COLUMNS])
+    return timestamps, values
+
+
+def _downsample_ohlcv(
+    timestamps: np.ndarray, values: np.ndarray, n_out: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Сжимает ряд свечей до n_out свечей, объединяя соседние в равные блоки.
+    
+    Экстремумы сохраняются точно (high — максимум блока, low — минимум),
+    поэтому форма графика не теряется, в отличие от простого tail().
+    
+    Args:
+        timestamps: Метки времени datetime64
+        values: Матрица OHLCV формы (N, 5)
+        n_out: Максимальное количество свечей на выходе
+    
+    Returns:
+        Кортеж (timestamps, values) длиной не более n_out
+    """
+    n = len(values)
+    if n <= n_out:
+        return timestamps, values
+    
+    starts = np.linspace(0, n, n_out, endpoint=False).astype(np.intp)
+    ends = np.append(starts[1:], n) - 1
+    out = np.empty((n_out, 5), dtype=values.dtype)
+    out[:, 0] = values[starts, 0]
+    out[:, 1] = np.maximum.reduceat(values[:, 1], starts)
+    out[:, 2] = np.minimum.reduceat(values[:, 2], starts)
+    out[:, 3] = values[ends, 3]
+    out[:, 4] = np.add.reduceat(values[:, 4], starts)
+    return timestamps[starts], out
+
+
+def _summarize(values: np.ndarray, n: int) -> Dict:
+    """
+    Сводная статистика по последним n свечам за один срез NumPy.
+    
+    Args:
+        values: Матрица OHLCV формы (N, 5)
+        n: Количество последних свечей
+    
+    Returns:
+        Словарь с количеством свечей, ценой закрытия, минимумом, максимумом,
+        средним объемом и изменением за период в процентах
+    """
+    arr = values[-n:]
+    return {
+        "count": len(arr),
+        "close": arr[-1, 3],
+        "low": arr[:, 2].min(),
+        "high": arr[:, 1].max(),
+        "volume": arr[:, 4].mean(),
+        "change_pct": (arr[-1, 3] / arr[0, 0] - 1) * 100,
+    }
+
+
+def _detail_lines(timestamps: np.ndarray, values: np.ndarray, n: int) -> List[str]:
+    """Строки CSV с последними n свечами (с заголовком)."""
+    # ISO-строки вида YYYY-MM-DDTHH:MM:SS; "T" заменяется срезами прямо в строке свечи,
+    # без отдельного прохода np.char.replace
+    ts_text = np.datetime_as_string(timestamps[-n:], unit="s").tolist()
+    lines = [f"Детальные данные (последние {n} свечей):", "timestamp,open,high,low,close,volume"]
+    lines.extend(
+        f"{ts[:10]} {ts[11:]},{o:.2f},{h:.2f},{l:.2f},{c:.2f},{v:.2f}"
+        for ts, (o, h, l, c, v) in zip(ts_text, values[-n:].tolist())
+    )
+    return lines
+
+
+def _context_lines(portfolio_text: str, history_text: str) -> List[str]:
+    """Портфель и история сделок для промпта."""
+    lines = []
+    
+    # Портфель (первым — чтобы AI знал контекст)
+    if portfolio_text:
+        lines.append(portfolio_text)
+        lines.append("")
+    
+    # История сделок
+    if history_text:
+        lines.append(history_text)
+        lines.append("")
+    
+    return lines
+
+
+def _pair_lines(df: pd.DataFrame, symbol: str, indicators_text: str) -> List[str]:
+    """Технические индикаторы и свечи торгуемой пары для промпта."""
+    lines = []
+    
+    # Технические индикаторы
+    if indicators_text:
+        lines.append(indicators_text)
+        lines.append("")
+    
+    # Торгуемая пара
+    if not df.empty:
+        timestamps, values = _ohlcv_arrays(df, SUMMARY_CANDLES)
+        stats = _summarize(values, SUMMARY_CANDLES)
+        lines.append(f"=== {symbol} (последние {stats['count']} свечей) ===")
+        lines.append(f"Текущая цена: {stats['close']:.2f} USDT")
+        lines.append(f"Минимум за период: {stats['low']:.2f} USDT")
+        lines.append(f"Максимум за период: {stats['high']:.2f} USDT")
+        lines.append(f"Средний объем: {stats['volume']:.2f}")
+        lines.append(f"Изменение за период: {stats['change_pct']:.2f}%")
+        lines.append("")
+        lines.extend(_detail_lines(timestamps, values, DETAIL_CANDLES))
+        lines.append("")
+    
+    return lines
+
+
+def _frame_key(df: Optional[pd.DataFrame]) -> Tuple:
+    """Ключ кеша для свечей: длина и границы ряда меняются с каждой новой свечой."""
+    if df is None or df.empty:
+        return ()
+    return (len(df), df["timestamp"].iat[0], df["timestamp"].iat[-1], df["close"].iat[-1])
+
+
+def _correlation_lines(
+    gold_data: pd.DataFrame,
+    silver_data: Optional[pd.DataFrame],
+    polymarket_info: str,
+) -> List[str]:
+    """Золото, серебро и Polymarket для промпта (общие для всех пар, кешируются)."""
+    key = (_frame_key(gold_data), _frame_key(silver_data), polymarket_info)
+    lines = _correlation_cache.get(key)
+    if lines is None:
+        lines = _build_correlation_lines(gold_data, silver_data, polymarket_info)
+        _correlation_cache[key] = lines
+        if len(_correlation_cache) > CORRELATION_CACHE_SIZE:
+            _correlation_cache.popitem(last=False)
+    return lines
+
+
+def _build_correlation_lines(
+    gold_data: pd.DataFrame,
+    silver_data: Optional[pd.DataFrame],
+    polymarket_info: str,
+) -> List[str]:
+    lines = []
+    
+    # Золото (для анализа корреляции)
+    if not gold_data.empty:
+        timestamps, values = _ohlcv_arrays(gold_data, SUMMARY_CANDLES)
+        stats = _summarize(values, SUMMARY_CANDLES)
+        lines.append(f"=== Золото XAUT/USDT - для анализа корреляции (последние {stats['count']} свечей) ===")
+        lines.append(f"Текущая цена: {stats['close']:.2f} USDT")
+        lines.append(f"Изменение за период: {stats['change_pct']:.2f}%")
+        lines.append("")
+        lines.extend(_detail_lines(timestamps, values, DETAIL_CANDLES))
+        lines.append("")
+    
+    # Серебро (для анализа корреляции)
+    if silver_data is not None and not silver_data.empty:
+        timestamps, values = _ohlcv_arrays(silver_data, SUMMARY_CANDLES)
+        stats = _summarize(values, SUMMARY_CANDLES)
+        lines.append(f"=== Серебро XAGUSD - для анализа корреляции (последние {stats['count']} свечей) ===")
+        lines.append(f"Текущая цена: {stats['close']:.2f} USD")
+        lines.append(f"Изменение за период: {stats['change_pct']:.2f}%")
+        lines.append("")
+        lines.extend(_detail_lines(timestamps, values, DETAIL_CANDLES))
+        lines.append("")
+    
+    # Polymarket
+    lines.append("=== Геополитический фактор ===")
+    lines.append(polymarket_info)
+    
+    return lines
+
+
+@lru_cache(maxsize=CHART_CACHE_SIZE)
+def _image_data_url(image: bytes) -> str:
+    """
+    data URL графика для запроса. Один и тот же график уходит в пакетный запрос
+    и в повторные запросы по парам, поэтому base64 строится один раз на изображение
+    (хеш bytes кешируется объектом, повторный поиск почти бесплатен).
+    """
+    return f"data:{CHART_ENCODINGS[CHART_FORMAT][2]};base64," + base64.b64encode(image).decode("ascii")
+
+
+@lru_cache(maxsize=None)
+def _load_plotting():
+    """
+    Ленивый импорт matplotlib/mplfinance/Pillow: они нужны только для графиков
+    и заметно замедляют импорт модуля.
+    
+    Returns:
+        Кортеж (matplotlib.pyplot, mplfinance, PIL.Image)
+    """
+    import matplotlib
+    matplotlib.use("Agg")  # Графики только рендерятся в файл/буфер, интерактивный backend не нужен
+    import matplotlib.pyplot as plt
+    import mplfinance as mpf
+    from PIL import Image
+    return plt, mpf, Image
+
+
+@lru_cache(maxsize=None)
+def _chart_style() -> dict:
+    """Стиль свечного графика: одинаков для всех графиков, собирается один раз."""
+    _, mpf, _ = _load_plotting()
+    mc = mpf.make_marketcolors(
+        up='#26a69a',
+        down='#ef5350',
+        edge='inherit',
+        wick='inherit',
+        volume='in'
+    )
+    return mpf.make_mpf_style(
+        marketcolors=mc,
+        gridstyle='-',
+        gridcolor='#e0e0e0',
+        facecolor='white',
+        figcolor='white'
+    )
+
+
+@lru_cache(maxsize=None)
+def _get_openai_client(api_key: Optional[str], base_url: str) -> "OpenAI":
+    """
+    Общий OpenAI-клиент (и пул соединений) для каждого провайдера.
+    
+    Кэш без ограничения: вытесненный клиент не закрывался бы, а пар
+    (ключ, URL) за время работы процесса — единицы.
+    """
+    from openai import OpenAI
+    
+    # Создаем http_client без прокси
+    http_client = httpx.Client(
+        timeout=HTTP_TIMEOUT,
+        limits=HTTP_LIMITS,
+        http2=HTTP2
+    )
+    return OpenAI(
+        api_key=api_key,
+        base_url=base_url,
+        http_client=http_client
+    )
+
 
 class DeepSeekClient:
     def __init__(self):
         self.provider = config.AI_PROVIDER.lower()
         
-        # Создаем http_client без прокси
-        http_client = httpx.Client(
-            timeout=30.0
-        )
-        
         if self.provider == "openrouter":
             logger.info("Использование OpenRouter для доступа к AI моделям")
-            self.client = OpenAI(
-                api_key=config.OPENROUTER_API_KEY,
-                base_url=config.OPENROUTER_API_BASE,
-                http_client=http_client
-            )
+            self.api_key = config.OPENROUTER_API_KEY
+            self.base_url = config.OPENROUTER_API_BASE
             self.model = config.OPENROUTER_MODEL
             self.extra_headers = {
                 "HTTP-Referer": "https://github.com/sergeyerin/ai-agent-trader",
@@ -39,17 +487,29 @@ class DeepSeekClient:
             }
         else:  # deepseek
             logger.info("Использование DeepSeek напрямую")
-            self.client = OpenAI(
-                api_key=config.DEEPSEEK_API_KEY,
-                base_url=config.DEEPSEEK_API_BASE,
-                http_client=http_client
-            )
+            self.api_key = config.DEEPSEEK_API_KEY
+            self.base_url = config.DEEPSEEK_API_BASE
             self.model = config.DEEPSEEK_MODEL
             self.extra_headers = {}
+        
+        # Возможности модели определяются один раз, а не на каждый запрос
+        model = self.model.lower()
+        self.supports_vision = any(tag in model for tag in VISION_MODEL_TAGS)
+        
+        self.client = _get_openai_client(self.api_key, self.base_url)
+        
+        # Директория для сохраняемых графиков создается один раз
+        if config.SAVE_CHARTS:
+            os.makedirs(CHARTS_DIR, exist_ok=True)
+    
+    @property
+    def needs_chart(self) -> bool:
+        """Нужны ли графики в запросе: без поддержки изображений их не стоит строить."""
+        return self.supports_vision
     
-    def create_chart(self, df: pd.DataFrame, symbol: str, title: str) -> str:
+    def create_chart(self, df: pd.DataFrame, symbol: str, title: str) -> bytes:
         """
-        Создание графика цен и кодирование в base64.
+        Создание графика цен (формат задается CHART_FORMAT).
         
         Args:
             df: DataFrame с данными OHLCV
@@ -57,79 +517,96 @@ class DeepSeekClient:
             title: Заголовок графика
         
         Returns:
-            Base64-кодированное изображение графика
+            Изображение графика (base64 кодируется при сборке запроса)
         """
         if df.empty:
-            return ""
+            return b""
+        
+        # Повторный запрос графика по тем же данным (тот же тик) не перерисовывает его
+        key = (symbol, title, _frame_key(df))
+        image_bytes = _chart_cache.get(key)
+        if image_bytes is not None:
+            _chart_cache.move_to_end(key)
+            logger.info(f"График для {symbol} взят из кеша")
+            return image_bytes
         
+        image_bytes = self._render_chart(df, symbol, title)
+        if image_bytes:
+            _chart_cache[key] = image_bytes
+            if len(_chart_cache) > CHART_CACHE_SIZE:
+                _chart_cache.popitem(last=False)
+        return image_bytes
+    
+    def _render_chart(self, df: pd.DataFrame, symbol: str, title: str) -> bytes:
+        """Отрисовка и кодирование графика (без кеша), см. create_chart."""
+        plt, mpf, Image = _load_plotting()
         try:
             # Берем последние 7 дней (2016 свечей по 5 минут)
             # 7 дней * 24 часа * 60 минут / 5 минут = 2016 свечей
-            plot_data = df.tail(min(2016, len(df))).copy()
-            
-            # Подготавливаем данные для mplfinance
-            plot_data_mpf = plot_data.set_index('timestamp')
-            plot_data_mpf = plot_data_mpf[['open', 'high', 'low', 'close', 'volume']]
-            plot_data_mpf.columns = ['Open', 'High', 'Low', 'Close', 'Volume']
+            timestamps, values = _ohlcv_arrays(df, CHART_CANDLES)
+            timestamps, values = _downsample_ohlcv(timestamps, values, CHART_MAX_POINTS)
             
-            # Настройка стиля
-            mc = mpf.make_marketcolors(
-                up='#26a69a',
-                down='#ef5350',
-                edge='inherit',
-                wick='inherit',
-                volume='in'
-            )
-            
-            s = mpf.make_mpf_style(
-                marketcolors=mc,
-                gridstyle='-',
-                gridcolor='#e0e0e0',
-                facecolor='white',
-                figcolor='white'
+            # Подготавливаем данные для mplfinance: один блок float64 без копий,
+            # переименований и переиндексации исходного DataFrame
+            plot_data_mpf = pd.DataFrame(
+                values,
+                index=pd.DatetimeIndex(timestamps),
+                columns=MPF_COLUMNS,
+                copy=False
             )
             
             # Создаем график
             fig, axes = mpf.plot(
                 plot_data_mpf,
                 type='candle',
-                style=s,
+                style=_chart_style(),
                 title=f'{title} (7 дней)',
                 ylabel='Цена (USDT)',
                 ylabel_lower='Объем',
                 volume=True,
-                figsize=(24, 10),  # Очень широкий график для отображения всех 2016 свечей
+                figsize=(24, 10),
                 returnfig=True,
-                datetime_format='%m-%d',
-                xrotation=45,
-                warn_too_much_data=2500  # Повышаем порог предупреждения выше 2016
+                warn_too_much_data=CHART_CANDLES + 1
             )
             
-            # Создаем директорию для графиков если её нет
-            charts_dir = "charts"
-            if not os.path.exists(charts_dir):
-                os.makedirs(charts_dir)
-            
-            # Генерируем имя файла с временной меткой
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            chart_filename = f"{charts_dir}/{symbol}_{timestamp}.png"
-            
-            # Сохраняем график на диск
-            plt.savefig(chart_filename, format='png', dpi=100, bbox_inches='tight')
-            logger.info(f"График сохранен: {chart_filename}")
+            # Подписи оси X: фиксированные позиции (индексы свечей) и даты, отформатированные
+            # одним вызовом NumPy, вместо автоматического локатора/форматтера дат.
+            # Оси цены и объема делят ось X, подписи выводятся под графиком объема.
+            tick_pos = np.linspace(0, len(timestamps) - 1, CHART_X_TICKS).round().astype(np.intp)
+            tick_labels = [
+                label[5:].replace("T", " ")  # YYYY-MM-DDTHH:MM -> MM-DD HH:MM
+                for label in np.datetime_as_string(timestamps[tick_pos], unit="m").tolist()
+            ]
+            axes[2].set_xticks(tick_pos, tick_labels, rotation=45)
             
-            # Сохраняем в буфер и кодируем в base64
+            # Один проход отрисовки на Agg без bbox_inches='tight' (он рендерит фигуру повторно),
+            # изображение кодируется один раз и используется и для файла, и для запроса
+            try:
+                fig.canvas.draw()
+                image = Image.frombuffer(
+                    "RGBA", fig.canvas.get_width_height(), fig.canvas.buffer_rgba(), "raw", "RGBA", 0, 1
+                ).convert("RGB")
+            finally:
+                plt.close(fig)
             buffer = io.BytesIO()
-            plt.savefig(buffer, format='png', dpi=100, bbox_inches='tight')
-            buffer.seek(0)
-            image_base64 = base64.b64encode(buffer.read()).decode('utf-8')
-            plt.close(fig)
+            pil_format, save_params, _ = CHART_ENCODINGS[CHART_FORMAT]
+            image.save(buffer, format=pil_format, **save_params)
+            image_bytes = buffer.getvalue()
+            
+            # Сохраняем график на диск только для отладки (SAVE_CHARTS)
+            if config.SAVE_CHARTS:
+                # Генерируем имя файла с временной меткой
+                timestamp = time.strftime("%Y%m%d_%H%M%S")
+                chart_filename = f"{CHARTS_DIR}/{symbol}_{timestamp}.{CHART_FORMAT}"
+                with open(chart_filename, "wb") as f:
+                    f.write(image_bytes)
+                logger.info(f"График сохранен: {chart_filename}")
             
-            return image_base64
+            return image_bytes
             
         except Exception as e:
             logger.error(f"Ошибка при создании графика для {symbol}: {e}")
-            return ""
+            return b""
     
     def prepare_market_data(
         self,
@@ -158,196 +635,95 @@ class DeepSeekClient:
         Returns:
             Форматированная строка с данными
         """
-        data_summary = []
-        
-        # Портфель (первым — чтобы AI знал контекст)
-        if portfolio_text:
-            data_summary.append(portfolio_text)
-            data_summary.append("")
-        
-        # История сделок
-        if history_text:
-            data_summary.append(history_text)
-            data_summary.append("")
-        
-        # Технические индикаторы
-        if indicators_text:
-            data_summary.append(indicators_text)
-            data_summary.append("")
-        
-        # Торгуемая пара
-        if not trading_pair_data.empty:
-            recent_data = trading_pair_data.tail(min(288, len(trading_pair_data)))
-            data_summary.append(f"=== {trading_pair_symbol} (последние {len(recent_data)} свечей) ===")
-            data_summary.append(f"Текущая цена: {recent_data['close'].iloc[-1]:.2f} USDT")
-            data_summary.append(f"Минимум за период: {recent_data['low'].min():.2f} USDT")
-            data_summary.append(f"Максимум за период: {recent_data['high'].max():.2f} USDT")
-            data_summary.append(f"Средний объем: {recent_data['volume'].mean():.2f}")
-            data_summary.append(f"Изменение за период: {((recent_data['close'].iloc[-1] / recent_data['open'].iloc[0] - 1) * 100):.2f}%")
-            data_summary.append("")
-            
-            data_summary.append("Детальные данные (последние 50 свечей):")
-            data_summary.append("timestamp,open,high,low,close,volume")
-            detailed_data = recent_data.tail(50)
-            for _, row in detailed_data.iterrows():
-                data_summary.append(
-                    f"{row['timestamp']},{row['open']:.2f},{row['high']:.2f},{row['low']:.2f},{row['close']:.2f},{row['volume']:.2f}"
-                )
-            data_summary.append("")
-        
-        # Золото (для анализа корреляции)
-        if not gold_data.empty:
-            gold_recent = gold_data.tail(min(288, len(gold_data)))
-            data_summary.append(f"=== Золото XAUT/USDT - для анализа корреляции (последние {len(gold_recent)} свечей) ===")
-            data_summary.append(f"Текущая цена: {gold_recent['close'].iloc[-1]:.2f} USDT")
-            data_summary.append(f"Изменение за период: {((gold_recent['close'].iloc[-1] / gold_recent['open'].iloc[0] - 1) * 100):.2f}%")
-            data_summary.append("")
-            
-            data_summary.append("Детальные данные (последние 50 свечей):")
-            data_summary.append("timestamp,open,high,low,close,volume")
-            detailed_gold = gold_recent.tail(50)
-            for _, row in detailed_gold.iterrows():
-                data_summary.append(
-                    f"{row['timestamp']},{row['open']:.2f},{row['high']:.2f},{row['low']:.2f},{row['close']:.2f},{row['volume']:.2f}"
-                )
-            data_summary.append("")
-        
-        # Серебро (для анализа корреляции)
-        if silver_data is not None and not silver_data.empty:
-            silver_recent = silver_data.tail(min(288, len(silver_data)))
-            data_summary.append(f"=== Серебро XAGUSD - для анализа корреляции (последние {len(silver_recent)} свечей) ===")
-            data_summary.append(f"Текущая цена: {silver_recent['close'].iloc[-1]:.2f} USD")
-            data_summary.append(f"Изменение за период: {((silver_recent['close'].iloc[-1] / silver_recent['open'].iloc[0] - 1) * 100):.2f}%")
-            data_summary.append("")
-            
-            data_summary.append("Детальные данные (последние 50 свечей):")
-            data_summary.append("timestamp,open,high,low,close,volume")
-            detailed_silver = silver_recent.tail(50)
-            for _, row in detailed_silver.iterrows():
-                data_summary.append(
-                    f"{row['timestamp']},{row['open']:.2f},{row['high']:.2f},{row['low']:.2f},{row['close']:.2f},{row['volume']:.2f}"
-                )
-            data_summary.append("")
-        
-        # Polymarket
-        data_summary.append("=== Геополитический фактор ===")
-        data_summary.append(polymarket_info)
-        
+        data_summary = _context_lines(portfolio_text, history_text)
+        data_summary.extend(_pair_lines(trading_pair_data, trading_pair_symbol, indicators_text))
+        data_summary.extend(_correlation_lines(gold_data, silver_data, polymarket_info))
         return "\n".join(data_summary)
     
-    def get_trading_recommendation(
+    def prepare_pair_data(
         self,
-        market_data: str,
+        trading_pair_data: pd.DataFrame,
         trading_pair_symbol: str,
-        current_price: float,
-        max_trade_amount: float,
-        chart_images: Optional[Dict[str, str]] = None
-    ) -> Optional[Dict]:
+        indicators_text: str = "",
+    ) -> str:
         """
-        Получение торговой рекомендации от DeepSeek.
+        Данные одной пары (индикаторы и свечи) для пакетного запроса.
         
         Args:
-            market_data: Форматированные данные рынка
+            trading_pair_data: Данные по торгуемой паре
             trading_pair_symbol: Символ торгуемой пары
-            current_price: Текущая цена
-            max_trade_amount: Максимальная сумма сделки в USDT
+            indicators_text: Технические индикаторы (форматированный текст)
         
         Returns:
-            Словарь с рекомендацией или None
+            Форматированная строка с данными пары
         """
-        # Извлекаем базовую валюту
-        base_currency = trading_pair_symbol.replace("USDT", "")
+        return "\n".join(_pair_lines(trading_pair_data, trading_pair_symbol, indicators_text))
+    
+    def prepare_shared_data(
+        self,
+        gold_data: pd.DataFrame,
+        silver_data: pd.DataFrame = None,
+        polymarket_info: str = "",
+        portfolio_text: str = "",
+        history_text: str = "",
+    ) -> str:
+        """
+        Общий для всех пар контекст пакетного запроса: портфель, история,
+        корреляционные активы и Polymarket.
         
-        # Добавляем упоминание о графиках если они есть
-        chart_note = ""
-        if chart_images and trading_pair_symbol in chart_images:
-            chart_note = "\n\nВНИМАНИЕ: К этому запросу прикреплен график с историческими данными цены и объема. Используй визуальный анализ графика для выявления трендов, уровней поддержки/сопротивления и паттернов."
+        Args:
+            gold_data: Данные по золоту
+            silver_data: Данные по серебру
+            polymarket_info: Информация с Polymarket
+            portfolio_text: Состояние портфеля (форматированный текст)
+            history_text: История сделок (форматированный текст)
         
-        prompt = f"""Ты профессиональный количественный трейдер. Принимай решения на основе технических индикаторов и данных, а не интуиции.
-
-ДАННЫЕ ДЛЯ АНАЛИЗА:
-{market_data}{chart_note}
-
-ТЕКУЩИЕ ПАРАМЕТРЫ:
-- Текущая цена {base_currency}: {current_price:.2f} USDT
-- Максимальная сумма сделки: {max_trade_amount} USDT
-- Торговая пара: {trading_pair_symbol}
-- Комиссия Bybit: 0.1% за сделку (учитывай при расчёте целесообразности)
-
-ПРАВИЛА ПРИНЯТИЯ РЕШЕНИЙ:
-1. Используй предоставленные технические индикаторы (RSI, EMA, MACD, Bollinger Bands, ATR) как основу решения.
-2. НЕ покупай при RSI > 70 (перекуплен). НЕ продавай при RSI < 30 (перепродан).
-3. Торгуй по тренду: покупай когда EMA20 > EMA50 > EMA200, продавай при обратном.
-4. Учитывай ширину Bollinger Bands — узкие полосы = скорый сильный ход.
-5. Если нет чёткого сигнала — выбирай hold. Лучше пропустить сделку, чем потерять на комиссиях.
-6. Учитывай текущий портфель: не покупай то, чего и так много. Продавай с прибылью.
-7. Анализируй свои прошлые сделки: если последние сделки убыточные, будь осторожнее.
-8. Данные по золоту/серебру — ТОЛЬКО для анализа корреляции, мы ими НЕ торгуем.
-
-ФОРМАТ ОТВЕТА (строго JSON):
-{{
-    "action": "buy" | "sell" | "hold",
-    "price_from": число или null,
-    "price_to": число или null,
-    "quantity_usdt": число (сумма в USDT, не более {max_trade_amount}) или null,
-    "confidence": число от 0 до 100,
-    "reasoning": "краткое объяснение с указанием конкретных индикаторов"
-}}
-
-ВАЖНО: Ответь ТОЛЬКО JSON, без дополнительного текста. Поле confidence — твоя уверенность в рекомендации от 0 до 100."""
-
-        try:
-            # Подготовка сообщений
-            system_prompt = (
-                "Ты количественный трейдер. Отвечай только в формате JSON.\n\n"
-                "СТРАТЕГИЯ:\n"
-                "1. Momentum: покупай при восходящем тренде (EMA20>EMA50>EMA200) и растущем MACD.\n"
-                "2. Mean Reversion: покупай при отскоке от нижней Bollinger Band + RSI<30.\n"
-                "3. НЕ торгуй если ожидаемый профит < 0.3% (комиссия round-trip = 0.2%).\n"
-                "4. В сомнениях — всегда hold."
+        Returns:
+            Форматированная строка с данными
+        """
+        data_summary = _context_lines(portfolio_text, history_text)
+        data_summary.extend(_correlation_lines(gold_data, silver_data, polymarket_info))
+        return "\n".join(data_summary)
+    
+    def _build_messages(self, prompt: str, images: List[bytes]) -> List[Dict]:
+        """Сообщения для chat.completions: системный промпт и запрос с графиками."""
+        if not images:
+            user_message = {"role": "user", "content": prompt}
+        else:
+            content = [{"type": "text", "text": prompt}]
+            content.extend(
+                {"type": "image_url", "image_url": {"url": _image_data_url(image)}}
+                for image in images
             )
-            messages = [
-                {"role": "system", "content": system_prompt}
-            ]
-            
-            # Если есть графики, добавляем их в запрос
-            if chart_images and trading_pair_symbol in chart_images:
-                # Проверяем, поддерживает ли модель vision
-                if "vision" in self.model.lower() or "gpt-4" in self.model.lower():
-                    logger.info(f"Добавление графика для {trading_pair_symbol} в запрос")
-                    messages.append({
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": prompt
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/png;base64,{chart_images[trading_pair_symbol]}"
-                                }
-                            }
-                        ]
-                    })
-                else:
-                    # Для моделей без vision просто отправляем текст
-                    logger.info(f"Модель {self.model} не поддерживает изображения, отправка только текста")
-                    messages.append({"role": "user", "content": prompt})
-            else:
-                messages.append({"role": "user", "content": prompt})
-            
-            # Подготовка параметров запроса
-            request_params = {
-                "model": self.model,
-                "messages": messages,
-                "temperature": 0.2,
-                "max_tokens": 500
-            }
-            
-            logger.info(f"Отправка запроса в {self.provider} (модель: {self.model})")
-            
-            # Отладочный вывод запроса (ПОЛНЫЙ)
+            user_message = {"role": "user", "content": content}
+        return [{"role": "system", "content": SYSTEM_PROMPT}, user_message]
+    
+    def _request_params(self, messages: List[Dict], max_tokens: int) -> Dict:
+        """
+        Параметры запроса chat.completions (с отладочным выводом).
+        
+        Args:
+            messages: Сообщения запроса
+            max_tokens: Лимит токенов ответа
+        
+        Returns:
+            Словарь параметров для chat.completions.create
+        """
+        request_params = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": 0.2,
+            "max_tokens": max_tokens,
+            "stream": True
+        }
+        # Для OpenRouter передаем extra_headers отдельно
+        if self.extra_headers:
+            request_params["extra_headers"] = self.extra_headers
+        
+        logger.info(f"Отправка запроса в {self.provider} (модель: {self.model})")
+        
+        # Отладочный вывод запроса (ПОЛНЫЙ): строки собираются только при включенном DEBUG
+        if logger.isEnabledFor(logging.DEBUG):
             logger.debug("=" * 80)
             logger.debug("AI REQUEST (FULL):")
             logger.debug(f"Model: {request_params['model']}")
@@ -370,43 +746,349 @@ class DeepSeekClient:
                             img_url = part['image_url']['url']
                             logger.debug(f"  Part {part_idx + 1} - Image: base64 data, length: {len(img_url)} chars")
             logger.debug("=" * 80)
-            
-            # Для OpenRouter передаем extra_headers отдельно
-            if self.extra_headers:
-                response = self.client.chat.completions.create(
-                    **request_params,
-                    extra_headers=self.extra_headers
-                )
-            else:
-                response = self.client.chat.completions.create(**request_params)
-            
-            response_text = response.choices[0].message.content.strip()
-            
-            # Отладочный вывод ответа
+        
+        return request_params
+    
+    @staticmethod
+    def _log_response(response_text: str) -> str:
+        """Отладочный вывод ответа модели."""
+        # Отладочный вывод ответа
+        if logger.isEnabledFor(logging.DEBUG):
             logger.debug("=" * 80)
             logger.debug("AI RESPONSE:")
             logger.debug(f"Response text:\n{response_text}")
             logger.debug("=" * 80)
+        
+        return response_text
+    
+    def _complete(self, messages: List[Dict], max_tokens: int) -> str:
+        """
+        Синхронная отправка запроса в модель, возвращает текст ответа.
+        Ответ читается потоком и обрывается, как только JSON закрыт.
+        """
+        stream = self.client.chat.completions.create(**self._request_params(messages, max_tokens))
+        parts = []
+        tracker = _JsonEndTracker()
+        try:
+            for chunk in stream:
+                content = chunk.choices[0].delta.content if chunk.choices else None
+                if content:
+                    if tracker.feed(content):
+                        # Пояснения модели после JSON в том же фрагменте отбрасываем
+                        parts.append(content[:tracker.end])
+                        break
+                    parts.append(content)
+        finally:
+            stream.close()
+        return self._log_response("".join(parts).strip())
+    
+    async def _acomplete(self, client: "AsyncOpenAI", messages: List[Dict], max_tokens: int) -> str:
+        """Асинхронный вариант _complete."""
+        stream = await client.chat.completions.create(**self._request_params(messages, max_tokens))
+        parts = []
+        tracker = _JsonEndTracker()
+        try:
+            async for chunk in stream:
+                content = chunk.choices[0].delta.content if chunk.choices else None
+                if content:
+                    if tracker.feed(content):
+                        # Пояснения модели после JSON в том же фрагменте отбрасываем
+                        parts.append(content[:tracker.end])
+                        break
+                    parts.append(content)
+        finally:
+            await stream.close()
+        return self._log_response("".join(parts).strip())
+    
+    @staticmethod
+    def _decode_response(decoder: msgspec.json.Decoder, response_text: str):
+        """
+        Декодирует ответ модели. Обычно это чистый JSON, поэтому сначала пробуем
+        его целиком и только при ошибке ищем блок ```json.
+        """
+        try:
+            return decoder.decode(response_text)
+        except msgspec.DecodeError:
+            match = _FENCE_RE.search(response_text)
+            if match is None:
+                raise
+            return decoder.decode(match.group(1).strip())
+    
+    def _build_recommendation_messages(
+        self,
+        market_data: str,
+        trading_pair_symbol: str,
+        current_price: float,
+        max_trade_amount: float,
+        chart_images: Optional[Dict[str, bytes]] = None
+    ) -> List[Dict]:
+        """Сообщения запроса рекомендации для одной пары."""
+        # Извлекаем базовую валюту
+        base_currency = trading_pair_symbol.replace("USDT", "")
+        
+        # Добавляем упоминание о графиках если они есть
+        chart_note = ""
+        if chart_images and trading_pair_symbol in chart_images:
+            chart_note = "\n\nВНИМАНИЕ: К этому запросу прикреплен график с историческими данными цены и объема. Используй визуальный анализ графика для выявления трендов, уровней поддержки/сопротивления и паттернов."
+        
+        prompt = "".join([
+            PROMPT_PREFIX,
+            PROMPT_RULES,
+            PROMPT_FORMAT,
+            f'    "quantity_usdt": число (сумма в USDT, не более {max_trade_amount}) или null,\n',
+            PROMPT_FORMAT_END,
+            market_data,
+            chart_note,
+            "\n\nТЕКУЩИЕ ПАРАМЕТРЫ:\n",
+            f"- Текущая цена {base_currency}: {current_price:.2f} USDT\n",
+            f"- Максимальная сумма сделки: {max_trade_amount} USDT\n",
+            f"- Торговая пара: {trading_pair_symbol}\n",
+            PROMPT_SUFFIX,
+        ])
+        
+        # Если есть графики, добавляем их в запрос
+        images = []
+        if chart_images and trading_pair_symbol in chart_images:
+            if self.supports_vision:
+                logger.info(f"Добавление графика для {trading_pair_symbol} в запрос")
+                images.append(chart_images[trading_pair_symbol])
+            else:
+                # Для моделей без vision просто отправляем текст
+                logger.info(f"Модель {self.model} не поддерживает изображения, отправка только текста")
+        
+        return self._build_messages(prompt, images)
+    
+    def _parse_recommendation(self, response_text: str) -> Optional[Dict]:
+        """Разбор и валидация ответа с рекомендацией для одной пары."""
+        try:
+            recommendation = self._decode_response(_RECOMMENDATION_DECODER, response_text)
+        except msgspec.DecodeError as e:
+            print(f"Ошибка парсинга ответа DeepSeek: {e}")
+            print(f"Ответ: {response_text}")
+            return None
+        
+        return msgspec.to_builtins(recommendation)
+    
+    def get_trading_recommendation(
+        self,
+        market_data: str,
+        trading_pair_symbol: str,
+        current_price: float,
+        max_trade_amount: float,
+        chart_images: Optional[Dict[str, bytes]] = None
+    ) -> Optional[Dict]:
+        """
+        Получение торговой рекомендации от DeepSeek.
+        
+        Args:
+            market_data: Форматированные данные рынка
+            trading_pair_symbol: Символ торгуемой пары
+            current_price: Текущая цена
+            max_trade_amount: Максимальная сумма сделки в USDT
+        
+        Returns:
+            Словарь с рекомендацией или None
+        """
+        try:
+            messages = self._build_recommendation_messages(
+                market_data, trading_pair_symbol, current_price, max_trade_amount, chart_images
+            )
+            response_text = self._complete(messages, max_tokens=500)
+        except Exception as e:
+            print(f"Ошибка при получении рекомендации от DeepSeek: {e}")
+            return None
+        
+        return self._parse_recommendation(response_text)
+    
+    def create_async_client(self) -> "AsyncOpenAI":
+        """
+        Новый AsyncOpenAI-клиент для текущего провайдера.
+        
+        Соединения httpx.AsyncClient привязаны к event loop, поэтому клиент
+        создается на время работы одного loop и закрывается через `async with`.
+        """
+        from openai import AsyncOpenAI
+        
+        return AsyncOpenAI(
+            api_key=self.api_key,
+            base_url=self.base_url,
+            http_client=httpx.AsyncClient(timeout=HTTP_TIMEOUT, limits=HTTP_LIMITS, http2=HTTP2)
+        )
+    
+    async def aget_trading_recommendation(
+        self,
+        market_data: str,
+        trading_pair_symbol: str,
+        current_price: float,
+        max_trade_amount: float,
+        chart_images: Optional[Dict[str, bytes]] = None,
+        client: Optional["AsyncOpenAI"] = None
+    ) -> Optional[Dict]:
+        """
+        Асинхронный вариант get_trading_recommendation, позволяет запускать
+        запросы по нескольким парам через asyncio.gather.
+        
+        Args:
+            market_data: Форматированные данные рынка
+            trading_pair_symbol: Символ торгуемой пары
+            current_price: Текущая цена
+            max_trade_amount: Максимальная сумма сделки в USDT
+            chart_images: Словарь с графиками (optional)
+            client: Общий клиент из create_async_client(); если не передан,
+                создается временный на один запрос
+        
+        Returns:
+            Словарь с рекомендацией или None
+        """
+        if client is None:
+            async with self.create_async_client() as own_client:
+                return await self.aget_trading_recommendation(
+                    market_data, trading_pair_symbol, current_price,
+                    max_trade_amount, chart_images, client=own_client
+                )
+        
+        try:
+            messages = self._build_recommendation_messages(
+                market_data, trading_pair_symbol, current_price, max_trade_amount, chart_images
+            )
+            response_text = await self._acomplete(client, messages, max_tokens=500)
+        except Exception as e:
+            print(f"Ошибка при получении рекомендации от DeepSeek: {e}")
+            return None
+        
+        return self._parse_recommendation(response_text)
+    
+    async def _agather_recommendations(
+        self,
+        requests: List[Dict],
+        max_trade_amount: float,
+        chart_images: Optional[Dict[str, bytes]] = None
+    ) -> List[Optional[Dict]]:
+        # Один клиент на все запросы, соединения переиспользуются
+        async with self.create_async_client() as client:
+            return await asyncio.gather(*(
+                self.aget_trading_recommendation(
+                    request["market_data"], request["symbol"], request["current_price"],
+                    max_trade_amount, chart_images, client=client
+                )
+                for request in requests
+            ))
+    
+    def get_trading_recommendations_concurrent(
+        self,
+        requests: List[Dict],
+        max_trade_amount: float,
+        chart_images: Optional[Dict[str, bytes]] = None
+    ) -> Dict[str, Optional[Dict]]:
+        """
+        Параллельное получение рекомендаций: отдельный запрос на каждую пару,
+        все запросы выполняются одновременно.
+        
+        Args:
+            requests: Список словарей {"symbol", "market_data", "current_price"},
+                market_data — результат prepare_market_data
+            max_trade_amount: Максимальная сумма сделки в USDT
+            chart_images: Словарь с графиками (optional)
+        
+        Returns:
+            Словарь {symbol: рекомендация или None}
+        """
+        if not requests:
+            return {}
+        try:
+            results = asyncio.run(self._agather_recommendations(requests, max_trade_amount, chart_images))
+        except Exception as e:
+            print(f"Ошибка при получении рекомендаций от DeepSeek: {e}")
+            results = [None] * len(requests)
+        return {request["symbol"]: result for request, result in zip(requests, results)}
+    
+    def get_trading_recommendations_batch(
+        self,
+        pairs: List[Dict],
+        shared_data: str,
+        max_trade_amount: float,
+        chart_images: Optional[Dict[str, bytes]] = None
+    ) -> Dict[str, Optional[Dict]]:
+        """
+        Получение рекомендаций сразу для нескольких пар одним запросом.
+        
+        Args:
+            pairs: Список словарей {"symbol", "market_data", "current_price"},
+                market_data — результат prepare_pair_data
+            shared_data: Общий контекст (результат prepare_shared_data)
+            max_trade_amount: Максимальная сумма сделки в USDT
+            chart_images: Словарь с графиками (optional)
+        
+        Returns:
+            Словарь {symbol: рекомендация или None}
+        """
+        recommendations = {pair["symbol"]: None for pair in pairs}
+        if not pairs:
+            return recommendations
+        
+        images = []
+        if chart_images and not self.supports_vision:
+            logger.info(f"Модель {self.model} не поддерживает изображения, отправка только текста")
+        
+        sections = []
+        for pair in pairs:
+            symbol = pair["symbol"]
+            base_currency = symbol.replace("USDT", "")
+            sections.append(pair["market_data"])
+            sections.append(f"Текущая цена {base_currency}: {pair['current_price']:.2f} USDT\n")
+            if chart_images and symbol in chart_images and self.supports_vision:
+                images.append(chart_images[symbol])
+        
+        chart_note = ""
+        if images:
+            chart_note = "\n\nВНИМАНИЕ: К этому запросу прикреплены графики с историческими данными цены и объема (в порядке перечисления пар). Используй визуальный анализ графиков для выявления трендов, уровней поддержки/сопротивления и паттернов."
+        
+        prompt = "".join([
+            PROMPT_PREFIX,
+            PROMPT_RULES,
+            BATCH_PROMPT_FORMAT,
+            f'            "quantity_usdt": число (сумма в USDT, не более {max_trade_amount}) или null,\n',
+            BATCH_PROMPT_FORMAT_END,
+            shared_data,
+            "\n\n",
+            "\n".join(sections),
+            chart_note,
+            "\n\nТЕКУЩИЕ ПАРАМЕТРЫ:\n",
+            f"- Максимальная сумма сделки (на каждую пару): {max_trade_amount} USDT\n",
+            f"- Торговые пары: {', '.join(recommendations)}\n",
+            BATCH_PROMPT_SUFFIX,
+        ])
+        
+        try:
+            response_text = self._complete(
+                self._build_messages(prompt, images),
+                max_tokens=500 * len(pairs)
+            )
+            data = self._decode_response(_BATCH_DECODER, response_text)
+            items = data.recommendations if isinstance(data, RecommendationBatch) else data
             
-            # Попытка извлечь JSON из ответа
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in response_text:
-                response_text = response_text.split("```")[1].split("```")[0].strip()
-            
-            recommendation = json.loads(response_text)
-            
-            # Валидация ответа
-            if "action" not in recommendation:
-                print("Ошибка: отсутствует поле 'action' в ответе")
-                return None
-            
-            return recommendation
+            for item in items:
+                try:
+                    recommendation = _RECOMMENDATION_DECODER.decode(item)
+                except msgspec.DecodeError as e:
+                    logger.error(f"Некорректная рекомендация в пакетном ответе: {e}")
+                    continue
+                if recommendation.symbol in recommendations:
+                    recommendations[recommendation.symbol] = msgspec.to_builtins(recommendation)
             
-        except json.JSONDecodeError as e:
+        except msgspec.DecodeError as e:
             print(f"Ошибка парсинга JSON от DeepSeek: {e}")
             print(f"Ответ: {response_text if 'response_text' in locals() else 'N/A'}")
-            return None
         except Exception as e:
-            print(f"Ошибка при получении рекомендации от DeepSeek: {e}")
-            return None
+            print(f"Ошибка при получении рекомендаций от DeepSeek: {e}")
+        
+        return recommendations
+
+
+@lru_cache(maxsize=None)
+def get_deepseek_client() -> DeepSeekClient:
+    """
+    Возвращает общий экземпляр DeepSeekClient: настройки провайдера читаются
+    из config один раз, и все пользователи работают через один HTTP-клиент.
+    """
+    return DeepSeekClient()
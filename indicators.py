@@ -1,12 +1,14 @@
 """
 Модуль расчёта технических индикаторов из pandas DataFrame.
-Все индикаторы рассчитываются на чистом pandas без внешних библиотек.
+Ряды индикаторов (calculate_*) рассчитываются на pandas и используются бэктестом;
+текущие значения для агента считаются одним проходом Numba в compute_all_indicators.
 """
 
 import pandas as pd
 import numpy as np
 import logging
 from typing import Dict, Optional
+from numba import njit
 
 logger = logging.getLogger(__name__)
 
@@ -43,8 +45,11 @@ def calculate_bollinger_bands(
     df: pd.DataFrame, period: int = 20, num_std: float = 2.0
 ) -> Dict[str, pd.Series]:
     """Bollinger Bands."""
-    sma = df["close"].rolling(window=period).mean()
-    std = df["close"].rolling(window=period).std()
+    # Один объект Rolling на оба расчета; rolling().agg(["mean", "std"]) в pandas
+    # не объединяет проходы и заметно медленнее из-за накладных расходов agg
+    rolling = df["close"].rolling(window=period)
+    sma = rolling.mean()
+    std = rolling.std()
     return {
         "upper": sma + num_std * std,
         "middle": sma,
@@ -54,11 +59,116 @@ def calculate_bollinger_bands(
 
 def calculate_atr(df: pd.DataFrame, period: int = 14) -> pd.Series:
     """ATR (Average True Range)."""
-    high_low = df["high"] - df["low"]
-    high_close = (df["high"] - df["close"].shift(1)).abs()
-    low_close = (df["low"] - df["close"].shift(1)).abs()
-    true_range = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-    return true_range.rolling(window=period).mean()
+    high = df["high"].to_numpy(dtype=np.float64)
+    low = df["low"].to_numpy(dtype=np.float64)
+    prev_close = df["close"].shift(1).to_numpy(dtype=np.float64)
+    # Поэлементный максимум без промежуточного DataFrame; fmax пропускает NaN
+    # первой свечи так же, как max(axis=1)
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    return pd.Series(true_range, index=df.index).rolling(window=period).mean()
+
+
+@njit(cache=True)
+def _ewm_update(weighted, old_wt, x, alpha, adjust):
+    """
+    Шаг EWM в той же форме, что и в pandas (ignore_na=False).
+
+    NaN во входе не меняет значение, но вес старого значения продолжает затухать;
+    пока значения нет (ведущие NaN), берется первое наблюдение.
+
+    Returns:
+        (новое значение, новый вес старого значения)
+    """
+    if weighted == weighted:
+        old_wt *= 1.0 - alpha
+        if x == x:
+            new_wt = 1.0 if adjust else alpha
+            if weighted != x:
+                weighted = (old_wt * weighted + new_wt * x) / (old_wt + new_wt)
+            old_wt = old_wt + new_wt if adjust else 1.0
+    elif x == x:
+        weighted = x
+    return weighted, old_wt
+
+
+@njit(cache=True)
+def _fmax(a, b):
+    """Максимум с пропуском NaN, как np.fmax."""
+    if a != a or b > a:
+        return b
+    return a
+
+
+@njit(cache=True)
+def _latest_indicators(close, high, low):
+    """
+    Последние значения всех индикаторов за один проход по массивам.
+
+    Параметры совпадают с умолчаниями calculate_*: RSI(14), EMA 20/50/200,
+    MACD(12, 26, 9), Bollinger(20), ATR(14). EWM повторяют рекуррентные формулы
+    pandas (adjust=False для EMA/MACD, adjust=True для RSI) вместе с обработкой
+    NaN, поэтому значения совпадают с pandas-версиями и при пропусках в close:
+    EMA и MACD пропускают NaN, а Bollinger и ATR дают NaN, если пропуск попал в окно.
+
+    Returns:
+        (rsi, ema20, ema50, ema200, macd, signal, hist, hist_prev, sma20, std20, atr)
+    """
+    n = close.shape[0]
+    a20 = 2.0 / 21.0
+    a50 = 2.0 / 51.0
+    a200 = 2.0 / 201.0
+    a12 = 2.0 / 13.0
+    a26 = 2.0 / 27.0
+    a9 = 2.0 / 10.0
+    a_rsi = 1.0 / 14.0
+
+    # Состояние каждого EWM — значение и вес старого значения
+    ema20 = ema50 = ema200 = ema12 = ema26 = close[0]
+    wt20 = wt50 = wt200 = wt12 = wt26 = wt9 = 1.0
+    signal = ema12 - ema26  # MACD на первой свече
+    hist = hist_prev = 0.0
+    # RSI: EWM с adjust=True; разность с NaN (в том числе первая) дает нулевые gain/loss
+    avg_gain = avg_loss = 0.0
+    wt_gain = wt_loss = 1.0
+
+    for i in range(1, n):
+        x = close[i]
+        ema20, wt20 = _ewm_update(ema20, wt20, x, a20, False)
+        ema50, wt50 = _ewm_update(ema50, wt50, x, a50, False)
+        ema200, wt200 = _ewm_update(ema200, wt200, x, a200, False)
+        ema12, wt12 = _ewm_update(ema12, wt12, x, a12, False)
+        ema26, wt26 = _ewm_update(ema26, wt26, x, a26, False)
+        macd = ema12 - ema26
+        signal, wt9 = _ewm_update(signal, wt9, macd, a9, False)
+        hist_prev = hist
+        hist = macd - signal
+
+        delta = x - close[i - 1]
+        avg_gain, wt_gain = _ewm_update(avg_gain, wt_gain, delta if delta > 0 else 0.0, a_rsi, True)
+        avg_loss, wt_loss = _ewm_update(avg_loss, wt_loss, -delta if delta < 0 else 0.0, a_rsi, True)
+
+    macd = ema12 - ema26
+    rsi = np.nan if avg_loss == 0 else 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+    # Bollinger: среднее и выборочное стандартное отклонение последних 20 свечей
+    total = 0.0
+    for i in range(n - 20, n):
+        total += close[i]
+    sma20 = total / 20
+    sq = 0.0
+    for i in range(n - 20, n):
+        sq += (close[i] - sma20) ** 2
+    std20 = np.sqrt(sq / 19)
+
+    # ATR: среднее true range последних 14 свечей; NaN в компонентах
+    # пропускается так же, как np.fmax в calculate_atr
+    tr_total = 0.0
+    for i in range(n - 14, n):
+        tr = _fmax(high[i] - low[i], _fmax(abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1])))
+        tr_total += tr
+    atr = tr_total / 14
+
+    return rsi, ema20, ema50, ema200, macd, signal, hist, hist_prev, sma20, std20, atr
 
 
 def compute_all_indicators(df: pd.DataFrame) -> Optional[Dict]:
@@ -76,30 +186,32 @@ def compute_all_indicators(df: pd.DataFrame) -> Optional[Dict]:
         return None
 
     try:
-        rsi = calculate_rsi(df)
-        ema20 = calculate_ema(df, 20)
-        ema50 = calculate_ema(df, 50)
-        ema200 = calculate_ema(df, 200)
-        macd = calculate_macd(df)
-        bb = calculate_bollinger_bands(df)
-        atr = calculate_atr(df)
-
-        current = df["close"].iloc[-1]
+        close = df["close"].to_numpy(dtype=np.float64)
+        (
+            rsi_val, ema20, ema50, ema200,
+            macd_val, signal_val, hist_val, hist_prev,
+            bb_middle, bb_std, atr,
+        ) = _latest_indicators(
+            close,
+            df["high"].to_numpy(dtype=np.float64),
+            df["low"].to_numpy(dtype=np.float64),
+        )
+
+        current = close[-1]
 
         # Определяем тренд по EMA
-        if current > ema20.iloc[-1] > ema50.iloc[-1] > ema200.iloc[-1]:
+        if current > ema20 > ema50 > ema200:
             ema_trend = "сильный восходящий"
-        elif current > ema50.iloc[-1] > ema200.iloc[-1]:
+        elif current > ema50 > ema200:
             ema_trend = "восходящий"
-        elif current < ema20.iloc[-1] < ema50.iloc[-1] < ema200.iloc[-1]:
+        elif current < ema20 < ema50 < ema200:
             ema_trend = "сильный нисходящий"
-        elif current < ema50.iloc[-1] < ema200.iloc[-1]:
+        elif current < ema50 < ema200:
             ema_trend = "нисходящий"
         else:
             ema_trend = "боковой"
 
         # RSI интерпретация
-        rsi_val = rsi.iloc[-1]
         if rsi_val > 70:
             rsi_signal = "перекуплен"
         elif rsi_val < 30:
@@ -108,10 +220,6 @@ def compute_all_indicators(df: pd.DataFrame) -> Optional[Dict]:
             rsi_signal = "нейтральный"
 
         # MACD сигнал
-        macd_val = macd["macd"].iloc[-1]
-        signal_val = macd["signal"].iloc[-1]
-        hist_val = macd["histogram"].iloc[-1]
-        hist_prev = macd["histogram"].iloc[-2]
         if macd_val > signal_val and hist_val > hist_prev:
             macd_signal = "бычий (MACD выше сигнальной, гистограмма растёт)"
         elif macd_val < signal_val and hist_val < hist_prev:
@@ -119,10 +227,9 @@ def compute_all_indicators(df: pd.DataFrame) -> Optional[Dict]:
         else:
             macd_signal = "нейтральный"
 
-        # Bollinger Bands позиция
-        bb_upper = bb["upper"].iloc[-1]
-        bb_lower = bb["lower"].iloc[-1]
-        bb_middle = bb["middle"].iloc[-1]
+        # Bollinger Bands позиция (2 стандартных отклонения, как в calculate_bollinger_bands)
+        bb_upper = bb_middle + 2.0 * bb_std
+        bb_lower = bb_middle - 2.0 * bb_std
         bb_width = (bb_upper - bb_lower) / bb_middle * 100  # ширина в %
         if current >= bb_upper:
             bb_signal = "цена у верхней границы (возможен откат)"
@@ -135,9 +242,9 @@ def compute_all_indicators(df: pd.DataFrame) -> Optional[Dict]:
         return {
             "rsi": {"value": rsi_val, "signal": rsi_signal},
             "ema": {
-                "ema20": ema20.iloc[-1],
-                "ema50": ema50.iloc[-1],
-                "ema200": ema200.iloc[-1],
+                "ema20": ema20,
+                "ema50": ema50,
+                "ema200": ema200,
                 "trend": ema_trend,
             },
             "macd": {
@@ -153,7 +260,7 @@ def compute_all_indicators(df: pd.DataFrame) -> Optional[Dict]:
                 "width_pct": bb_width,
                 "interpretation": bb_signal,
             },
-            "atr": {"value": atr.iloc[-1]},
+            "atr": {"value": atr},
         }
 
     except Exception as e:
@@ -6,6 +6,7 @@
 import schedule
 import time
 import logging
+from functools import lru_cache
 from trading_agent import TradingAgent
 from config import config
 
@@ -21,11 +22,20 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=None)
+def get_agent() -> TradingAgent:
+    """
+    Агент создается один раз и переиспользуется между итерациями вместе с его
+    HTTP-сессиями (Bybit, Polymarket, AI). Если создание упало, следующая
+    итерация попробует снова: lru_cache не кеширует исключения.
+    """
+    return TradingAgent()
+
+
 def job():
     """Задача для выполнения агентом."""
     try:
-        agent = TradingAgent()
-        agent.run()
+        get_agent().run()
     except Exception as e:
         logger.error(f"Ошибка при выполнении торговой итерации: {e}", exc_info=True)
 
@@ -49,10 +59,15 @@ def main():
     
     logger.info(f"Агент запущен. Следующая итерация через {config.INTERVAL_MINUTES} минут.")
     
-    # Бесконечный цикл выполнения задач по расписанию
+    # Бесконечный цикл выполнения задач по расписанию: спим ровно до следующего
+    # запуска вместо пробуждения каждую секунду
     while True:
+        idle = schedule.idle_seconds()
+        if idle is None:  # Задач в расписании нет
+            break
+        if idle > 0:
+            time.sleep(idle)
         schedule.run_pending()
-        time.sleep(1)
 
 
 if __name__ == "__main__":
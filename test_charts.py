@@ -44,14 +44,14 @@ def test_chart_generation():
         
         # Создаем график
         logger.info(f"Создание графика для {symbol}...")
-        chart_base64 = deepseek.create_chart(
+        chart_image = deepseek.create_chart(
             data,
             symbol,
             f"{symbol.replace('USDT', '/USDT')}"
         )
         
-        if chart_base64:
-            logger.info(f"✓ График для {symbol} успешно создан (размер: {len(chart_base64)} символов)")
+        if chart_image:
+            logger.info(f"✓ График для {symbol} успешно создан (размер: {len(chart_image)} байт)")
         else:
             logger.error(f"✗ Не удалось создать график для {symbol}")
     
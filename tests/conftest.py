@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+# Модули проекта лежат в корне репозитория, а не в пакете
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+
+
+@pytest.fixture(scope="session")
+def ohlcv() -> pd.DataFrame:
+    """Фиксированные 5-минутные свечи BTCUSDT (800 штук)."""
+    return pd.read_csv(os.path.join(DATA_DIR, "BTCUSDT_5m.csv"), parse_dates=["timestamp"])
@@ -0,0 +1,234 @@
+"""
+Сверка Backtester.run() с исходным построчным циклом на pandas (до Numba).
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtester import TRADE_BUY, TRADE_REASONS, Backtester
+from indicators import calculate_atr, calculate_ema, calculate_macd, calculate_rsi
+
+
+def _reference_indicators(df: pd.DataFrame) -> pd.DataFrame:
+    return pd.DataFrame({
+        "rsi": calculate_rsi(df),
+        "ema20": calculate_ema(df, 20),
+        "ema50": calculate_ema(df, 50),
+        "macd_hist": calculate_macd(df)["histogram"],
+        "atr": calculate_atr(df),
+    })
+
+
+def _reference_run(bt: Backtester, df: pd.DataFrame, ind: pd.DataFrame):
+    """
+    Цикл бэктеста в исходном виде: iloc по Series, словарь позиции, список сделок.
+
+    Returns:
+        (final_balance, equity_curve, trades) — trades как список
+        (idx, action, reason, price, pnl)
+    """
+    balance = bt.initial_balance
+    position = None
+    equity_curve = []
+    trades = []
+
+    def close_position(price):
+        sell_value = position["qty"] * price
+        fee = sell_value * bt.FEE_PCT / 100
+        return sell_value - fee - position["entry_amount"]
+
+    for i in range(200, len(df)):
+        price = df["close"].iloc[i]
+        rsi = ind["rsi"].iloc[i]
+
+        if pd.isna(rsi) or pd.isna(ind["atr"].iloc[i]):
+            equity_curve.append(balance)
+            continue
+
+        equity = balance
+        if position:
+            equity += position["qty"] * price
+        equity_curve.append(equity)
+
+        if position:
+            loss_pct = (price - position["entry_price"]) / position["entry_price"] * 100
+            if loss_pct <= -bt.stop_loss_pct:
+                reason = "stop_loss"
+            elif loss_pct >= bt.take_profit_pct:
+                reason = "take_profit"
+            elif rsi > 65:
+                reason = "rsi_overbought"
+            else:
+                continue
+            pnl = close_position(price)
+            balance += position["qty"] * price - position["qty"] * price * bt.FEE_PCT / 100
+            trades.append((i, "sell", reason, price, pnl))
+            position = None
+        elif (
+            rsi < 35
+            and ind["ema20"].iloc[i] > ind["ema50"].iloc[i]
+            and ind["macd_hist"].iloc[i] > 0
+        ):
+            trade_amount = balance * (bt.position_size_pct / 100)
+            trade_amount = min(trade_amount, balance - 1)
+            if trade_amount < 1:
+                continue
+            fee = trade_amount * bt.FEE_PCT / 100
+            qty = (trade_amount - fee) / price
+            balance -= trade_amount
+            position = {"qty": qty, "entry_price": price, "entry_amount": trade_amount}
+            trades.append((i, "buy", "signal", price, 0.0))
+
+    if position:
+        final_price = df["close"].iloc[-1]
+        pnl = close_position(final_price)
+        balance += position["qty"] * final_price
+        trades.append((len(df) - 1, "sell", "end_of_data", final_price, pnl))
+
+    return balance, equity_curve, trades
+
+
+def _crafted_indicators(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Индикаторы с частыми сигналами: на реальных свечах условие покупки
+    (RSI < 35 при EMA20 > EMA50 и MACD hist > 0) почти не выполняется.
+    """
+    n = len(df)
+    idx = np.arange(n)
+    rsi = np.full(n, 50.0)
+    rsi[idx % 11 == 0] = 30.0
+    rsi[idx % 29 == 0] = 70.0
+    rsi[idx % 97 == 0] = np.nan
+    atr = np.full(n, 10.0)
+    atr[idx % 89 == 0] = np.nan
+    return pd.DataFrame({
+        "rsi": rsi,
+        "ema20": np.where(idx % 5 == 0, 1.0, 2.0),
+        "ema50": np.full(n, 1.5),
+        "macd_hist": np.where(idx % 7 == 0, -1.0, 1.0),
+        "atr": atr,
+    })
+
+
+def _assert_matches_reference(bt: Backtester, df: pd.DataFrame, ind: pd.DataFrame):
+    result = bt.run(df, "BTCUSDT")
+    balance, equity_curve, trades = _reference_run(bt, df, ind)
+
+    assert result.final_balance == pytest.approx(balance, rel=1e-12)
+    # Кривая капитала хранится в float32
+    np.testing.assert_allclose(result.equity_curve, equity_curve, rtol=1e-6)
+
+    assert len(result.trades) == len(trades)
+    for got, (idx, action, reason, price, pnl) in zip(result.trades, trades):
+        assert got["idx"] == idx
+        assert ("buy" if got["action"] == TRADE_BUY else "sell") == action
+        assert TRADE_REASONS[got["reason"]] == reason
+        assert got["price"] == price
+        assert got["pnl"] == pytest.approx(pnl, rel=1e-9, abs=1e-12)
+        assert got["timestamp"] == df["timestamp"].iloc[idx]
+    return result
+
+
+def test_run_matches_reference_on_csv(ohlcv):
+    bt = Backtester()
+    _assert_matches_reference(bt, ohlcv, _reference_indicators(ohlcv))
+
+
+@pytest.mark.parametrize(
+    "stop_loss_pct, take_profit_pct, position_size_pct",
+    [(5.0, 3.0, 5.0), (0.5, 0.5, 50.0), (1.0, 2.0, 100.0)],
+)
+def test_run_matches_reference_with_signals(
+    ohlcv, monkeypatch, stop_loss_pct, take_profit_pct, position_size_pct
+):
+    ind = _crafted_indicators(ohlcv)
+    monkeypatch.setattr(Backtester, "_get_indicators", lambda self, df, symbol: ind)
+    bt = Backtester(
+        stop_loss_pct=stop_loss_pct,
+        take_profit_pct=take_profit_pct,
+        position_size_pct=position_size_pct,
+    )
+    result = _assert_matches_reference(bt, ohlcv, ind)
+    assert result.total_trades > 0
+
+
+def test_run_covers_all_exit_reasons(ohlcv, monkeypatch):
+    ind = _crafted_indicators(ohlcv)
+    monkeypatch.setattr(Backtester, "_get_indicators", lambda self, df, symbol: ind)
+    reasons = set()
+    for sl, tp in [(0.3, 0.3), (5.0, 5.0)]:
+        result = Backtester(stop_loss_pct=sl, take_profit_pct=tp).run(ohlcv, "BTCUSDT")
+        reasons.update(TRADE_REASONS[r] for r in result.trades["reason"])
+    assert {"stop_loss", "take_profit", "rsi_overbought"} <= reasons
+
+
+def test_run_short_data_returns_initial_balance(ohlcv):
+    result = Backtester(initial_balance=250).run(ohlcv.iloc[:150], "BTCUSDT")
+    assert result.final_balance == 250
+    assert result.total_trades == 0
+
+
+def test_ema_crossover_keeps_float64_precision(ohlcv, monkeypatch):
+    # EMA20 выше EMA50 на 0.001 — меньше шага float32 на уровне 60000
+    n = len(ohlcv)
+    ind = pd.DataFrame({
+        "rsi": np.full(n, 30.0),
+        "ema20": np.full(n, 60000.001),
+        "ema50": np.full(n, 60000.0),
+        "macd_hist": np.ones(n),
+        "atr": np.ones(n),
+    })
+    monkeypatch.setattr(Backtester, "_get_indicators", lambda self, df, symbol: ind)
+    result = Backtester().run(ohlcv, "BTCUSDT")
+    assert result.trades[0]["action"] == TRADE_BUY
+    assert result.trades[0]["idx"] == 200
+
+
+def test_sweep_rows_match_individual_runs(ohlcv, monkeypatch):
+    ind = _crafted_indicators(ohlcv)
+    monkeypatch.setattr(Backtester, "_get_indicators", lambda self, df, symbol: ind)
+    stop_losses = [0.5, 2.0]
+    take_profits = [0.5, 1.0, 3.0]
+    sizes = [5.0, 50.0]
+
+    table = Backtester().sweep(ohlcv, "BTCUSDT", stop_losses, take_profits, sizes)
+
+    assert len(table) == len(stop_losses) * len(take_profits) * len(sizes)
+    row = table[
+        (table["position_size_pct"] == 50.0)
+        & (table["stop_loss_pct"] == 2.0)
+        & (table["take_profit_pct"] == 1.0)
+    ].iloc[0]
+    expected = Backtester(
+        position_size_pct=50.0, stop_loss_pct=2.0, take_profit_pct=1.0
+    ).run(ohlcv, "BTCUSDT").summary()
+    assert expected["trades"] > 0
+    for key, value in expected.items():
+        assert row[key] == pytest.approx(value), key
+
+
+def test_sweep_defaults_to_current_position_size(ohlcv):
+    table = Backtester(position_size_pct=7.0).sweep(ohlcv, "BTCUSDT", [1.0, 2.0], [3.0])
+    assert len(table) == 2
+    assert (table["position_size_pct"] == 7.0).all()
+
+
+@pytest.mark.parametrize("offset", [-1e-6, 1e-6])
+def test_rsi_thresholds_keep_float64_precision(ohlcv, monkeypatch, offset):
+    # RSI в пределах шага float32 от порогов 35/65: сигналы как у float64-эталона
+    n = len(ohlcv)
+    idx = np.arange(n)
+    rsi = np.where(idx % 2 == 0, 35.0 + offset, 65.0 + offset)
+    ind = pd.DataFrame({
+        "rsi": rsi,
+        "ema20": np.full(n, 2.0),
+        "ema50": np.ones(n),
+        "macd_hist": np.ones(n),
+        "atr": np.ones(n),
+    })
+    monkeypatch.setattr(Backtester, "_get_indicators", lambda self, df, symbol: ind)
+    bt = Backtester(stop_loss_pct=50.0, take_profit_pct=50.0)
+    result = _assert_matches_reference(bt, ohlcv, ind)
+    # Чуть ниже порогов — покупка без продажи по RSI; чуть выше — ни одной покупки
+    assert (result.total_trades > 0) == (offset < 0)
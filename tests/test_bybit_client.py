@@ -0,0 +1,133 @@
+"""
+Постраничная загрузка свечей BybitClient.get_klines без обращения к сети.
+"""
+
+import logging
+import queue
+import threading
+
+import numpy as np
+import pytest
+
+import bybit_client
+from bybit_client import KLINE_FETCH_ATTEMPTS, KLINE_PAGE_LIMIT, BybitClient, KlineFetchError
+
+INTERVAL_MS = 5 * 60_000
+
+
+class FakeHTTP:
+    """
+    Отдаёт свечи за запрошенное окно; failures — сколько раз окно отвечает ошибкой
+    (словарь и lock общие для всех клиентов пула).
+    """
+
+    def __init__(self, failures, lock, empty_before=None):
+        self.failures = failures
+        self.lock = lock
+        self.empty_before = empty_before
+        self.calls = []
+
+    def get_kline(self, category, symbol, interval, start, end, limit):
+        with self.lock:
+            self.calls.append((start, end, threading.get_ident()))
+            if self.failures.get(start, 0) > 0:
+                self.failures[start] -= 1
+                return {"retCode": 10006, "retMsg": "Too many visits"}
+        if self.empty_before is not None and end < self.empty_before:
+            return {"retCode": 0, "result": {"list": []}}
+        first = -(-start // INTERVAL_MS) * INTERVAL_MS
+        ts = list(range(first, end + 1, INTERVAL_MS))[::-1][:limit]
+        rows = [[str(t), "1", "2", "0.5", "1.5", "10", "15"] for t in ts]
+        return {"retCode": 0, "result": {"list": rows}}
+
+
+@pytest.fixture
+def kline_clients(monkeypatch):
+    """Подменяет пул pybit-клиентов свечей; use(...) настраивает ответы и отдает список созданных клиентов."""
+    created = []
+    options = {}
+
+    def create():
+        created.append(FakeHTTP(**options))
+        return created[-1]
+
+    monkeypatch.setattr(bybit_client, "_kline_clients", queue.SimpleQueue())
+    monkeypatch.setattr(bybit_client, "_create_kline_client", create)
+    monkeypatch.setattr(bybit_client, "KLINE_RETRY_DELAY", 0.0)
+    monkeypatch.setattr(bybit_client, "_kline_rate_limiter", bybit_client._RateLimiter(1e6))
+
+    def use(failures=None, empty_before=None):
+        options.update(failures=dict(failures or {}), lock=threading.Lock(), empty_before=empty_before)
+        return created
+
+    return use
+
+
+def _client():
+    return BybitClient.__new__(BybitClient)
+
+
+def _calls(created):
+    return [call for fake in created for call in fake.calls]
+
+
+def _range(pages):
+    end_time = 10_000 * INTERVAL_MS
+    start_time = end_time - pages * KLINE_PAGE_LIMIT * INTERVAL_MS + 1
+    return start_time, end_time
+
+
+def test_get_klines_returns_ascending_unique_candles(kline_clients):
+    created = kline_clients()
+    start_time, end_time = _range(8)
+    timestamps, values = _client().get_klines("BTCUSDT", "5", start_time, end_time)
+    assert len(timestamps) == 8 * KLINE_PAGE_LIMIT
+    assert np.all(np.diff(timestamps) == INTERVAL_MS)
+    assert values.shape == (len(timestamps), 6)
+    # Каждый клиент (и его Session) используется только одним потоком одновременно
+    assert 1 <= len(created) <= bybit_client.KLINE_FETCH_WORKERS
+
+
+def test_get_klines_reuses_pooled_clients(kline_clients):
+    created = kline_clients()
+    start_time, end_time = _range(3)
+    _client().get_klines("BTCUSDT", "5", start_time, end_time)
+    first = len(created)
+    _client().get_klines("BTCUSDT", "5", start_time, end_time)
+    assert len(created) == first
+
+
+def test_get_klines_retries_failed_window(kline_clients):
+    start_time, end_time = _range(3)
+    middle_start = end_time - 2 * KLINE_PAGE_LIMIT * INTERVAL_MS + 1
+    created = kline_clients(failures={middle_start: KLINE_FETCH_ATTEMPTS - 1})
+    timestamps, _ = _client().get_klines("BTCUSDT", "5", start_time, end_time)
+    assert len(timestamps) == 3 * KLINE_PAGE_LIMIT
+    attempts = sum(1 for start, _, _ in _calls(created) if start == middle_start)
+    assert attempts == KLINE_FETCH_ATTEMPTS
+
+
+def test_get_klines_raises_when_window_keeps_failing(kline_clients):
+    start_time, end_time = _range(3)
+    middle_start = end_time - 2 * KLINE_PAGE_LIMIT * INTERVAL_MS + 1
+    kline_clients(failures={middle_start: 100})
+    with pytest.raises(KlineFetchError, match=str(middle_start)):
+        _client().get_klines("BTCUSDT", "5", start_time, end_time)
+
+
+def test_get_klines_stops_at_empty_window(kline_clients, caplog):
+    start_time, end_time = _range(3)
+    # Данных нет раньше последнего окна (например, до листинга)
+    kline_clients(empty_before=end_time - KLINE_PAGE_LIMIT * INTERVAL_MS + 1)
+    with caplog.at_level(logging.WARNING, logger="bybit_client"):
+        timestamps, _ = _client().get_klines("BTCUSDT", "5", start_time, end_time)
+    assert len(timestamps) == KLINE_PAGE_LIMIT
+    assert any("обрезана" in r.getMessage() and str(start_time) in r.getMessage() for r in caplog.records)
+
+
+def test_rate_limiter_spaces_requests():
+    limiter = bybit_client._RateLimiter(rate=100)
+    start = bybit_client.time.monotonic()
+    for _ in range(5):
+        limiter.wait()
+    assert bybit_client.time.monotonic() - start >= 0.04 - 1e-3
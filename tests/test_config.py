@@ -0,0 +1,17 @@
+"""
+Разбор переменных окружения в Config.
+"""
+
+import pytest
+
+from config import _parse_bool
+
+
+@pytest.mark.parametrize("value", ["true", "True", "TRUE", " true ", "1", "yes", "Y"])
+def test_parse_bool_true(value):
+    assert _parse_bool(value) is True
+
+
+@pytest.mark.parametrize("value", ["false", "0", "", "no", "10", "tru", "yolo", "t", "on"])
+def test_parse_bool_false(value):
+    assert _parse_bool(value) is False
@@ -0,0 +1,213 @@
+"""
+DeepSeekClient без обращения к сети: разбор ответов и время жизни клиентов.
+"""
+
+from types import SimpleNamespace
+
+import msgspec
+import pytest
+
+import deepseek_client
+from deepseek_client import (
+    _BATCH_DECODER,
+    _RECOMMENDATION_DECODER,
+    DeepSeekClient,
+    RecommendationBatch,
+    _JsonEndTracker,
+)
+
+RECOMMENDATION_JSON = (
+    '{"action": "buy", "price_from": 99.5, "price_to": 100.5, '
+    '"quantity_usdt": 5.0, "confidence": 70, "reasoning": "тест"}'
+)
+
+BATCH_ITEMS = [
+    '{"symbol": "BTCUSDT", "action": "buy", "quantity_usdt": 5.0, "confidence": 70,'
+    ' "reasoning": "пробой [уровня] {62000}"}',
+    '{"symbol": "ETHUSDT", "action": "hold", "confidence": 40, "reasoning": "флэт"}',
+]
+BATCH_OBJECT = '{"recommendations": [' + ", ".join(BATCH_ITEMS) + "]}"
+BATCH_ARRAY = "[" + ", ".join(BATCH_ITEMS) + "]"
+
+
+class FakeStream:
+    """Поток ответа OpenAI по фрагментам; считает прочитанные фрагменты."""
+
+    def __init__(self, text, chunk_size):
+        self.chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+        self.read = 0
+        self.closed = False
+
+    def __iter__(self):
+        for content in self.chunks:
+            self.read += 1
+            delta = SimpleNamespace(content=content)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+    def close(self):
+        self.closed = True
+
+
+def _fake_openai(stream):
+    completions = SimpleNamespace(create=lambda **params: stream)
+    return SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+
+class FakeAsyncClient:
+    """Заменяет AsyncOpenAI: фиксирует закрытие через async with."""
+
+    instances = []
+
+    def __init__(self):
+        self.closed = False
+        FakeAsyncClient.instances.append(self)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.closed = True
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(deepseek_client, "_get_openai_client", lambda api_key, base_url: None)
+    return DeepSeekClient()
+
+
+def test_concurrent_recommendations_close_async_client(client, monkeypatch):
+    FakeAsyncClient.instances.clear()
+
+    async def fake_acomplete(self, async_client, messages, max_tokens):
+        assert isinstance(async_client, FakeAsyncClient)
+        return RECOMMENDATION_JSON
+
+    monkeypatch.setattr(DeepSeekClient, "create_async_client", lambda self: FakeAsyncClient())
+    monkeypatch.setattr(DeepSeekClient, "_acomplete", fake_acomplete)
+
+    requests = [
+        {"symbol": symbol, "market_data": "", "current_price": 100.0}
+        for symbol in ("BTCUSDT", "ETHUSDT")
+    ]
+    results = client.get_trading_recommendations_concurrent(requests, max_trade_amount=10.0)
+
+    assert set(results) == {"BTCUSDT", "ETHUSDT"}
+    assert all(r is not None and r["action"] == "buy" for r in results.values())
+    # Один общий клиент на все запросы, закрытый после gather
+    assert len(FakeAsyncClient.instances) == 1
+    assert FakeAsyncClient.instances[0].closed
+
+
+def _track(text, chunk_size=7):
+    """Скармливает текст трекеру фрагментами, возвращает прочитанную часть."""
+    tracker = _JsonEndTracker()
+    parts = []
+    for i in range(0, len(text), chunk_size):
+        chunk = text[i:i + chunk_size]
+        if tracker.feed(chunk):
+            parts.append(chunk[:tracker.end])
+            break
+        parts.append(chunk)
+    return "".join(parts)
+
+
+@pytest.mark.parametrize("text", [RECOMMENDATION_JSON, BATCH_OBJECT, BATCH_ARRAY])
+@pytest.mark.parametrize("chunk_size", [1, 7, 1000])
+def test_tracker_stops_after_root_closes(text, chunk_size):
+    # Хвост после JSON не дочитывается, даже если пришел в том же фрагменте
+    read = _track(text + "\n\nПояснение: {лишнее}", chunk_size)
+    assert read == text
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 64])
+def test_tracker_keeps_whole_bare_array(chunk_size):
+    read = _track(BATCH_ARRAY, chunk_size)
+    data = DeepSeekClient._decode_response(_BATCH_DECODER, read)
+    assert [msgspec.json.decode(item)["symbol"] for item in data] == ["BTCUSDT", "ETHUSDT"]
+
+
+def test_tracker_skips_fence_before_json():
+    text = "```json\n" + BATCH_ARRAY + "\n```"
+    read = _track(text)
+    assert read == "```json\n" + BATCH_ARRAY
+    assert len(DeepSeekClient._decode_response(_BATCH_DECODER, read)) == 2
+
+
+def test_decode_response_object():
+    recommendation = DeepSeekClient._decode_response(_RECOMMENDATION_DECODER, RECOMMENDATION_JSON)
+    assert recommendation.action == "buy"
+    assert recommendation.quantity_usdt == 5.0
+
+
+def test_decode_response_batch_object_and_array():
+    batch = DeepSeekClient._decode_response(_BATCH_DECODER, BATCH_OBJECT)
+    assert isinstance(batch, RecommendationBatch)
+    assert len(batch.recommendations) == 2
+    items = DeepSeekClient._decode_response(_BATCH_DECODER, BATCH_ARRAY)
+    assert isinstance(items, list)
+    assert len(items) == 2
+
+
+@pytest.mark.parametrize("text", [
+    "```json\n" + RECOMMENDATION_JSON + "\n```",
+    "Рекомендация:\n```\n" + RECOMMENDATION_JSON + "\n```\nУдачи",
+    "```json\n" + RECOMMENDATION_JSON,  # Обрыв до закрывающего ```
+])
+def test_decode_response_fenced(text):
+    recommendation = DeepSeekClient._decode_response(_RECOMMENDATION_DECODER, text)
+    assert recommendation.action == "buy"
+
+
+def test_decode_response_invalid_raises():
+    with pytest.raises(msgspec.DecodeError):
+        DeepSeekClient._decode_response(_RECOMMENDATION_DECODER, "нет JSON")
+
+
+@pytest.mark.parametrize("text", [BATCH_OBJECT, BATCH_ARRAY, "```json\n" + BATCH_ARRAY + "\n```"])
+def test_batch_recommendations_from_streamed_reply(client, text):
+    stream = FakeStream(text + "\nКомментарий модели после JSON", chunk_size=9)
+    client.client = _fake_openai(stream)
+    pairs = [
+        {"symbol": symbol, "market_data": "", "current_price": 100.0}
+        for symbol in ("BTCUSDT", "ETHUSDT")
+    ]
+
+    result = client.get_trading_recommendations_batch(pairs, "", max_trade_amount=10.0)
+
+    assert result["BTCUSDT"]["action"] == "buy"
+    assert result["ETHUSDT"]["action"] == "hold"
+    # Поток оборван после закрытия JSON и закрыт
+    assert stream.read < len(stream.chunks)
+    assert stream.closed
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"action": "hold", "reasoning": null}', {"action": "hold", "reasoning": None}),
+    ('{"action": "buy", "confidence": "80"}', {"action": "buy", "confidence": 80}),
+    ('{"action": "buy", "price_from": "100.5", "price_to": "101", "quantity_usdt": "5"}',
+     {"action": "buy", "price_from": 100.5, "price_to": 101.0, "quantity_usdt": 5.0}),
+    ('{"action": "BUY"}', {"action": "buy"}),
+    ('{"action": " Sell "}', {"action": "sell"}),
+])
+def test_parse_recommendation_accepts_lenient_replies(client, text, expected):
+    assert client._parse_recommendation(text) == expected
+
+
+@pytest.mark.parametrize("text", ['{"action": "short"}', '{"reasoning": "нет действия"}'])
+def test_parse_recommendation_rejects_invalid_action(client, text):
+    assert client._parse_recommendation(text) is None
+
+
+def test_batch_accepts_lenient_items(client):
+    text = (
+        '[{"symbol": "BTCUSDT", "action": "BUY", "confidence": "75", "reasoning": null},'
+        ' {"symbol": "ETHUSDT", "action": "Hold"}]'
+    )
+    client.client = _fake_openai(FakeStream(text, chunk_size=16))
+    pairs = [
+        {"symbol": symbol, "market_data": "", "current_price": 100.0}
+        for symbol in ("BTCUSDT", "ETHUSDT")
+    ]
+    result = client.get_trading_recommendations_batch(pairs, "", max_trade_amount=10.0)
+    assert result["BTCUSDT"] == {"action": "buy", "confidence": 75, "reasoning": None, "symbol": "BTCUSDT"}
+    assert result["ETHUSDT"]["action"] == "hold"
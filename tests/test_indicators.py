@@ -0,0 +1,100 @@
+"""
+Совпадение текущих значений compute_all_indicators с рядами calculate_* на pandas.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from indicators import (
+    _latest_indicators,
+    calculate_atr,
+    calculate_bollinger_bands,
+    calculate_ema,
+    calculate_macd,
+    calculate_rsi,
+    compute_all_indicators,
+)
+
+
+def _with_nan(df: pd.DataFrame, column: str, positions) -> pd.DataFrame:
+    df = df.copy()
+    df.loc[df.index[list(positions)], column] = np.nan
+    return df
+
+
+CASES = {
+    "clean": lambda df: df,
+    "close_nan_leading": lambda df: _with_nan(df, "close", [0, 1]),
+    "close_nan_middle": lambda df: _with_nan(df, "close", [300, 301, 450]),
+    # Пропуск в окне Bollinger и ATR: pandas дает NaN
+    "close_nan_recent": lambda df: _with_nan(df, "close", [len(df) - 5]),
+    "high_nan_recent": lambda df: _with_nan(df, "high", [len(df) - 3]),
+}
+
+
+def _reference(df: pd.DataFrame):
+    macd = calculate_macd(df)
+    bb = calculate_bollinger_bands(df)
+    return (
+        calculate_rsi(df).iloc[-1],
+        calculate_ema(df, 20).iloc[-1],
+        calculate_ema(df, 50).iloc[-1],
+        calculate_ema(df, 200).iloc[-1],
+        macd["macd"].iloc[-1],
+        macd["signal"].iloc[-1],
+        macd["histogram"].iloc[-1],
+        macd["histogram"].iloc[-2],
+        bb["middle"].iloc[-1],
+        df["close"].rolling(20).std().iloc[-1],
+        calculate_atr(df).iloc[-1],
+    )
+
+
+@pytest.mark.parametrize("case", list(CASES))
+def test_latest_indicators_match_pandas(ohlcv, case):
+    df = CASES[case](ohlcv)
+    got = _latest_indicators(
+        df["close"].to_numpy(dtype=np.float64),
+        df["high"].to_numpy(dtype=np.float64),
+        df["low"].to_numpy(dtype=np.float64),
+    )
+    expected = _reference(df)
+    names = ("rsi", "ema20", "ema50", "ema200", "macd", "signal", "hist", "hist_prev",
+             "sma20", "std20", "atr")
+    for name, value, ref in zip(names, got, expected):
+        assert value == pytest.approx(ref, rel=1e-9, abs=1e-9, nan_ok=True), name
+
+
+def test_latest_indicators_skip_nan_close(ohlcv):
+    # Одиночный пропуск в середине не должен делать EWM-индикаторы NaN
+    df = CASES["close_nan_middle"](ohlcv)
+    rsi, ema20, ema50, ema200, macd, signal, hist = _latest_indicators(
+        df["close"].to_numpy(dtype=np.float64),
+        df["high"].to_numpy(dtype=np.float64),
+        df["low"].to_numpy(dtype=np.float64),
+    )[:7]
+    assert np.isfinite([rsi, ema20, ema50, ema200, macd, signal, hist]).all()
+
+
+@pytest.mark.parametrize("case", ["clean", "close_nan_middle"])
+def test_compute_all_indicators_match_pandas(ohlcv, case):
+    df = CASES[case](ohlcv)
+    result = compute_all_indicators(df)
+    macd = calculate_macd(df)
+    bb = calculate_bollinger_bands(df)
+
+    assert result["rsi"]["value"] == pytest.approx(calculate_rsi(df).iloc[-1])
+    assert result["ema"]["ema20"] == pytest.approx(calculate_ema(df, 20).iloc[-1])
+    assert result["ema"]["ema50"] == pytest.approx(calculate_ema(df, 50).iloc[-1])
+    assert result["ema"]["ema200"] == pytest.approx(calculate_ema(df, 200).iloc[-1])
+    assert result["macd"]["macd"] == pytest.approx(macd["macd"].iloc[-1])
+    assert result["macd"]["signal"] == pytest.approx(macd["signal"].iloc[-1])
+    assert result["macd"]["histogram"] == pytest.approx(macd["histogram"].iloc[-1])
+    for key in ("upper", "middle", "lower"):
+        assert result["bollinger"][key] == pytest.approx(bb[key].iloc[-1])
+    assert result["atr"]["value"] == pytest.approx(calculate_atr(df).iloc[-1])
+
+
+def test_compute_all_indicators_short_data(ohlcv):
+    assert compute_all_indicators(ohlcv.iloc[:199]) is None
@@ -0,0 +1,87 @@
+"""
+TradingAgent.get_trading_decisions с фоновыми графиками, без сети и AI.
+"""
+
+import dataclasses
+from concurrent.futures import Future
+
+import pandas as pd
+import pytest
+
+import trading_agent
+from trading_agent import TradingAgent
+
+
+class FakeDeepSeek:
+    """Запоминает графики, с которыми запрошены рекомендации."""
+
+    def __init__(self):
+        self.chart_images = None
+
+    def prepare_shared_data(self, gold_data, **kwargs):
+        return ""
+
+    def prepare_pair_data(self, df, symbol, indicators_text):
+        return ""
+
+    def get_trading_recommendations_batch(self, pairs, shared_data, max_trade_amount, chart_images=None):
+        self.chart_images = chart_images
+        return {pair["symbol"]: {"action": "hold", "confidence": 50} for pair in pairs}
+
+
+@pytest.fixture
+def agent():
+    agent = TradingAgent.__new__(TradingAgent)
+    agent.deepseek = FakeDeepSeek()
+    agent.max_trade_amount = 10.0
+    return agent
+
+
+@pytest.fixture
+def market_data():
+    return {
+        "trading_pairs_data": {"BTCUSDT": {"data": pd.DataFrame(), "current_price": 100.0}},
+        "gold_data": pd.DataFrame(),
+        "polymarket_info": "",
+    }
+
+
+def _failed_future():
+    future = Future()
+    future.set_exception(RuntimeError("mplfinance упал"))
+    return future
+
+
+def test_chart_failure_only_drops_images(agent, market_data, caplog):
+    recommendations = agent.get_trading_decisions(market_data, _failed_future())
+    assert recommendations["BTCUSDT"]["action"] == "hold"
+    assert agent.deepseek.chart_images == {}
+    assert "mplfinance упал" in caplog.text
+
+
+def test_chart_future_result_is_used(agent, market_data):
+    future = Future()
+    future.set_result({"BTCUSDT": b"png"})
+    agent.get_trading_decisions(market_data, future)
+    assert agent.deepseek.chart_images == {"BTCUSDT": b"png"}
+
+
+def test_ai_disabled_cancels_pending_charts(agent, market_data, monkeypatch):
+    monkeypatch.setattr(
+        trading_agent, "config", dataclasses.replace(trading_agent.config, ENABLE_AI_ANALYSIS=False)
+    )
+    future = Future()
+    recommendations = agent.get_trading_decisions(market_data, future)
+    assert recommendations["BTCUSDT"]["action"] == "hold"
+    assert future.cancelled()
+
+
+def test_ai_disabled_logs_error_of_running_render(agent, market_data, monkeypatch, caplog):
+    monkeypatch.setattr(
+        trading_agent, "config", dataclasses.replace(trading_agent.config, ENABLE_AI_ANALYSIS=False)
+    )
+    future = Future()
+    future.set_running_or_notify_cancel()  # Отрисовка уже идет — отменить нельзя
+    agent.get_trading_decisions(market_data, future)
+    future.set_exception(RuntimeError("Pillow упал"))
+    assert "Pillow упал" in caplog.text
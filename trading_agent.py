@@ -1,11 +1,12 @@
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional, Dict
+from typing import Optional, Dict, Union
 import logging
 import pandas as pd
 
-from bybit_client import BybitClient
+from bybit_client import BybitClient, KlineFetchError
 from polymarket_client import PolymarketClient
-from deepseek_client import DeepSeekClient
+from deepseek_client import get_deepseek_client
 from portfolio_manager import PortfolioManager
 from trade_history import TradeHistory
 from risk_manager import RiskManager
@@ -42,12 +43,43 @@ logging.getLogger('PIL').setLevel(logging.INFO)
 
 logger = logging.getLogger(__name__)
 
+# Один фоновый поток для графиков на весь процесс, общий для всех экземпляров агента:
+# pyplot не рассчитан на параллельную отрисовку
+_chart_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="charts")
+
+
+def _await_charts(chart_images: Optional[Union[Dict[str, bytes], Future]]) -> Dict[str, bytes]:
+    """
+    Графики для запроса; Future фоновой отрисовки дожидается.
+
+    Ошибка отрисовки (mplfinance, Pillow, битые данные) стоит только графиков:
+    решения запрашиваются без них.
+    """
+    if isinstance(chart_images, Future):
+        try:
+            chart_images = chart_images.result()
+        except Exception as e:
+            logger.error(f"Ошибка фоновой отрисовки графиков, запрос без графиков: {e}", exc_info=True)
+            return {}
+    return chart_images or {}
+
+
+def _log_chart_error(future: Future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.error(f"Ошибка фоновой отрисовки графиков: {future.exception()}")
+
+
+def _discard_charts(chart_images: Optional[Union[Dict[str, bytes], Future]]):
+    """Графики не понадобились: отменяет отрисовку, а начатую — не теряет ошибку."""
+    if isinstance(chart_images, Future) and not chart_images.cancel():
+        chart_images.add_done_callback(_log_chart_error)
+
 
 class TradingAgent:
     def __init__(self):
         self.bybit = BybitClient()
         self.polymarket = PolymarketClient()
-        self.deepseek = DeepSeekClient()
+        self.deepseek = get_deepseek_client()
         self.portfolio = PortfolioManager(self.bybit)
         self.history = TradeHistory()
         self.risk_manager = RiskManager(self.history, self.portfolio)
@@ -76,10 +108,15 @@ class TradingAgent:
             trading_pairs_data = {}
             for pair in self.trading_pairs:
                 logger.info(f"Получение данных {pair}...")
-                pair_data = self.bybit.get_historical_data(
-                    pair,
-                    config.HISTORICAL_DAYS
-                )
+                try:
+                    pair_data = self.bybit.get_historical_data(
+                        pair,
+                        config.HISTORICAL_DAYS
+                    )
+                except KlineFetchError as e:
+                    # Пару с неполной историей пропускаем, остальные анализируем
+                    logger.error(f"Пропуск {pair}: {e}")
+                    continue
                 current_price = self.bybit.get_current_price(pair)
                 
                 if current_price is None:
@@ -102,10 +139,14 @@ class TradingAgent:
                 gold_data = trading_pairs_data[config.GOLD_SYMBOL]["data"]
             else:
                 logger.info("Получение данных золота XAUT/USDT...")
-                gold_data = self.bybit.get_historical_data(
-                    config.GOLD_SYMBOL,
-                    config.HISTORICAL_DAYS
-                )
+                try:
+                    gold_data = self.bybit.get_historical_data(
+                        config.GOLD_SYMBOL,
+                        config.HISTORICAL_DAYS
+                    )
+                except KlineFetchError as e:
+                    logger.error(f"Данные золота недоступны: {e}")
+                    gold_data = pd.DataFrame()
             
             # Получаем данные Polymarket
             logger.info("Получение данных Polymarket...")
@@ -121,7 +162,7 @@ class TradingAgent:
             logger.error(f"Ошибка при сборе рыночных данных: {e}")
             return None
     
-    def create_charts(self, market_data: Dict) -> Dict[str, str]:
+    def create_charts(self, market_data: Dict) -> Dict[str, bytes]:
         """
         Создание графиков для всех инструментов.
         
@@ -129,10 +170,14 @@ class TradingAgent:
             market_data: Собранные рыночные данные
         
         Returns:
-            Словарь с base64-кодированными графиками
+            Словарь с изображениями графиков
         """
-        logger.info("Создание графиков для анализа...")
         chart_images = {}
+        if not self.deepseek.needs_chart:
+            logger.info(f"Модель {self.deepseek.model} не поддерживает изображения, графики не создаются")
+            return chart_images
+        
+        logger.info("Создание графиков для анализа...")
         
         # Создаем графики для всех инструментов кроме SOLUSDT
         for symbol in market_data["trading_pairs_data"].keys():
@@ -141,13 +186,13 @@ class TradingAgent:
                 if not pair_data.empty:
                     logger.info(f"Создание графика для {symbol}...")
                     try:
-                        chart_base64 = self.deepseek.create_chart(
+                        chart_image = self.deepseek.create_chart(
                             pair_data,
                             symbol,
                             symbol.replace("USDT", "/USDT")
                         )
-                        if chart_base64:
-                            chart_images[symbol] = chart_base64
+                        if chart_image:
+                            chart_images[symbol] = chart_image
                             logger.info(f"График для {symbol} успешно создан")
                     except Exception as e:
                         logger.error(f"Ошибка при создании графика для {symbol}: {e}")
@@ -172,7 +217,7 @@ class TradingAgent:
     def get_trading_decisions(
         self,
         market_data: Dict,
-        chart_images: Optional[Dict[str, str]] = None,
+        chart_images: Optional[Union[Dict[str, bytes], Future]] = None,
         indicators_texts: Optional[Dict[str, str]] = None,
         portfolio_text: str = "",
         history_text: str = "",
@@ -182,7 +227,7 @@ class TradingAgent:
         
         Args:
             market_data: Собранные рыночные данные
-            chart_images: Словарь с графиками (optional)
+            chart_images: Словарь с графиками или Future фоновой задачи create_charts (optional)
             indicators_texts: Словарь с индикаторами по символам
             portfolio_text: Текст портфеля для промпта
             history_text: Текст истории сделок для промпта
@@ -192,49 +237,81 @@ class TradingAgent:
         """
         if not config.ENABLE_AI_ANALYSIS:
             logger.warning("Анализ AI отключен. Возвращаем пустые рекомендации.")
+            _discard_charts(chart_images)
             return {pair: {"action": "hold", "reasoning": "AI analysis disabled"} 
                     for pair in market_data["trading_pairs_data"].keys()}
         
         logger.info("Подготовка данных для DeepSeek...")
         
-        if chart_images is None:
-            chart_images = {}
         if indicators_texts is None:
             indicators_texts = {}
         
-        recommendations = {}
+        # Общий контекст отправляется один раз, а не для каждой пары
+        shared_data = self.deepseek.prepare_shared_data(
+            market_data["gold_data"],
+            polymarket_info=market_data["polymarket_info"],
+            portfolio_text=portfolio_text,
+            history_text=history_text,
+        )
+        pairs = [
+            {
+                "symbol": pair,
+                "market_data": self.deepseek.prepare_pair_data(
+                    pair_info["data"], pair, indicators_texts.get(pair, "")
+                ),
+                "current_price": pair_info["current_price"],
+            }
+            for pair, pair_info in market_data["trading_pairs_data"].items()
+        ]
+        
+        # Графики нужны только для запроса: ждем фоновую отрисовку после подготовки текста
+        chart_images = _await_charts(chart_images)
+        
+        logger.info(f"Получение рекомендаций для {len(pairs)} пар одним запросом...")
+        recommendations = self.deepseek.get_trading_recommendations_batch(
+            pairs,
+            shared_data,
+            self.max_trade_amount,
+            chart_images=chart_images
+        )
         
-        for pair, pair_info in market_data["trading_pairs_data"].items():
-            logger.info(f"Получение рекомендации для {pair}...")
-            
-            formatted_data = self.deepseek.prepare_market_data(
-                pair_info["data"],
-                pair,
-                market_data["gold_data"],
-                polymarket_info=market_data["polymarket_info"],
-                indicators_text=indicators_texts.get(pair, ""),
-                portfolio_text=portfolio_text,
-                history_text=history_text,
-            )
-            
-            recommendation = self.deepseek.get_trading_recommendation(
-                formatted_data,
-                pair,
-                pair_info["current_price"],
-                self.max_trade_amount,
-                chart_images=chart_images
+        # Пары без ответа в пакете запрашиваем по отдельности, параллельно
+        missing = [pair for pair, recommendation in recommendations.items() if recommendation is None]
+        if missing:
+            logger.warning(f"Нет рекомендаций в пакетном ответе для {', '.join(missing)}, повторный запрос по парам")
+            retry_requests = [
+                {
+                    "symbol": pair,
+                    "market_data": self.deepseek.prepare_market_data(
+                        market_data["trading_pairs_data"][pair]["data"],
+                        pair,
+                        market_data["gold_data"],
+                        polymarket_info=market_data["polymarket_info"],
+                        indicators_text=indicators_texts.get(pair, ""),
+                        portfolio_text=portfolio_text,
+                        history_text=history_text,
+                    ),
+                    "current_price": market_data["trading_pairs_data"][pair]["current_price"],
+                }
+                for pair in missing
+            ]
+            recommendations.update(
+                self.deepseek.get_trading_recommendations_concurrent(
+                    retry_requests,
+                    self.max_trade_amount,
+                    chart_images=chart_images
+                )
             )
-            
+        
+        for pair, recommendation in recommendations.items():
             if recommendation:
                 confidence = recommendation.get("confidence", 0)
                 logger.info(
                     f"Рекомендация для {pair}: {recommendation.get('action')} "
                     f"(уверенность: {confidence}%)"
                 )
-                recommendations[pair] = recommendation
             else:
                 logger.error(f"Не удалось получить рекомендацию для {pair}")
-                recommendations[pair] = None
         
         return recommendations
     
@@ -420,15 +497,15 @@ class TradingAgent:
             }
             self.execute_trade(sym, sell_rec, action["current_price"])
         
-        # 6. Вычисляем технические индикаторы
-        indicators_texts = self.compute_indicators(market_data)
+        # 6. Создаём графики в фоне, параллельно с индикаторами и подготовкой промпта
+        chart_future = _chart_executor.submit(self.create_charts, market_data)
         
-        # 7. Создаём графики
-        chart_images = self.create_charts(market_data)
+        # 7. Вычисляем технические индикаторы
+        indicators_texts = self.compute_indicators(market_data)
         
         # 8. Получаем торговые решения с учётом индикаторов, портфеля и истории
         recommendations = self.get_trading_decisions(
-            market_data, chart_images,
+            market_data, chart_future,
             indicators_texts=indicators_texts,
             portfolio_text=portfolio_text,
             history_text=history_text,